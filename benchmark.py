@@ -0,0 +1,369 @@
+"""Offline benchmarks for the assistant's screen pipeline.
+
+Run against recorded frames so results are reproducible on a headless box:
+
+    python benchmark.py record frames/ --count 30       # on a desktop
+    python benchmark.py pipeline --source replay:frames/
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import circular_window as cw
+
+
+def _summarize(name, samples_ms):
+    """One table row: stage, mean, p50, p95, max (milliseconds)"""
+    if not samples_ms:
+        return f"{name:<14} {'-':>8} {'-':>8} {'-':>8} {'-':>8}"
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return (f"{name:<14} {statistics.mean(ordered):>8.1f} {statistics.median(ordered):>8.1f} "
+            f"{p95:>8.1f} {ordered[-1]:>8.1f}")
+
+
+def _print_table(timings):
+    print(f"{'stage':<14} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}   (ms)")
+    for name, samples in timings.items():
+        print(_summarize(name, samples))
+
+
+def cmd_record(args):
+    """Save frames from a live source so they can be replayed later"""
+    source = cw.create_screen_source(args.source)
+    os.makedirs(args.directory, exist_ok=True)
+    for i in range(args.count):
+        frame = source.grab()
+        frame.save(os.path.join(args.directory, f"frame_{i:04d}.png"))
+        time.sleep(args.interval)
+    source.close()
+    print(f"Recorded {args.count} frames to {args.directory}")
+
+
+def cmd_pipeline(args):
+    """Time each monitoring/upload stage over a sequence of frames"""
+    source = cw.create_screen_source(args.source)
+    print(f"Source: {source.name}")
+    differ = cw.TileDiffEngine()
+    encoder = cw.ImageEncoder()
+    policy = cw.VisionPayloadPolicy()
+    timings = {name: [] for name in ("grab", "tile_diff", "phash", "payload", "encode", "total")}
+    changed = 0
+    payload_bytes = 0
+
+    for _ in range(args.frames):
+        t0 = time.perf_counter()
+        image = source.grab()
+        t1 = time.perf_counter()
+        screen_diff = differ.diff(image)
+        t2 = time.perf_counter()
+        cw.perceptual_hash(image)
+        t3 = time.perf_counter()
+        payload = policy.plan(image.size, args.kind).apply(image)
+        t4 = time.perf_counter()
+        data, _ = encoder.encode(payload)
+        t5 = time.perf_counter()
+
+        for name, start, end in (("grab", t0, t1), ("tile_diff", t1, t2), ("phash", t2, t3),
+                                 ("payload", t3, t4), ("encode", t4, t5), ("total", t0, t5)):
+            timings[name].append((end - start) * 1000.0)
+        changed += 1 if screen_diff.significant else 0
+        payload_bytes += len(data)
+    source.close()
+
+    _print_table(timings)
+    print(f"\n{args.frames} frames, {changed} significant changes, "
+          f"avg payload {payload_bytes / max(1, args.frames) / 1024:.0f} KiB ({args.kind})")
+
+
+def cmd_ocr_cache(args):
+    """Full-screen OCR vs the tile cache, cold and warm, over replayed frames"""
+    source = cw.create_screen_source(args.source)
+    cache = cw.TileOcrCache(tile_size=args.tile_size)
+    timings = {name: [] for name in ("full", "tiles_cold", "tiles_warm")}
+    for i in range(args.frames):
+        image = source.grab()
+        if i < args.full_frames:
+            t0 = time.perf_counter()
+            cw.extract_ocr_candidates(image)
+            timings["full"].append((time.perf_counter() - t0) * 1000.0)
+        _, misses_before, _ = cache.stats()
+        t0 = time.perf_counter()
+        words = cache.ocr(image)
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        _, misses_after, _ = cache.stats()
+        # A frame is "warm" when at least one tile came from the cache
+        all_missed = misses_after - misses_before == len(cache.regions(image.size))
+        timings["tiles_cold" if all_missed else "tiles_warm"].append(elapsed)
+    source.close()
+
+    _print_table(timings)
+    hits, misses, entries = cache.stats()
+    print(f"\n{args.frames} frames, {len(words)} words in last frame, "
+          f"tile hits {hits}, misses {misses}, {entries} cached tiles")
+
+
+def cmd_ocr_engines(args):
+    """Latency of each OCR backend on the same frames, plus a parity check of their output"""
+    source = cw.create_screen_source(args.source)
+    frames = [source.grab() for _ in range(args.frames)]
+    source.close()
+    if args.crop:
+        # Guided steps often OCR a region rather than the full screen
+        frames = [frame.crop((0, 0, min(frame.width, args.crop), min(frame.height, args.crop))) for frame in frames]
+
+    results = {}
+    timings = {}
+    for name in ("pytesseract", "tesserocr"):
+        if name == "tesserocr" and cw.tesserocr is None:
+            print("tesserocr not installed, skipping")
+            continue
+        t0 = time.perf_counter()
+        engine = cw.create_ocr_engine(name)
+        startup = (time.perf_counter() - t0) * 1000.0
+        samples = []
+        words = []
+        for _ in range(args.repeat):
+            for frame in frames:
+                t0 = time.perf_counter()
+                words = cw.extract_ocr_candidates(frame, engine)
+                samples.append((time.perf_counter() - t0) * 1000.0)
+        engine.close()
+        timings[engine.name] = samples
+        results[engine.name] = words
+        print(f"{engine.name}: startup {startup:.0f} ms")
+
+    _print_table(timings)
+    if len(results) == 2:
+        a, b = ([(w["text"], w["left"], w["top"]) for w in words] for words in results.values())
+        same = len(set(a) & set(b))
+        print(f"\nParity on last frame: {same}/{max(len(a), len(b))} identical word boxes")
+
+
+def cmd_ocr_scaling(args):
+    """Cold tiled OCR time for 1..N worker processes"""
+    source = cw.create_screen_source(args.source)
+    frames = [source.grab() for _ in range(args.frames)]
+    source.close()
+    max_workers = args.max_workers or os.cpu_count() or 1
+
+    print(f"{'workers':>7} {'mean ms':>9} {'speedup':>8} {'words':>6}")
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        pool = cw.OcrPool(workers) if workers > 1 else None
+        if pool:
+            pool.map([frames[0].crop((0, 0, 64, 64))] * workers)  # Start the workers outside the timing
+        samples = []
+        words = []
+        for frame in frames:
+            # A fresh cache per frame so every tile is actually OCR'd
+            cache = cw.TileOcrCache(tile_size=args.tile_size, band_height=args.band_height, pool=pool)
+            t0 = time.perf_counter()
+            words = cache.ocr(frame)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        if pool:
+            pool.close()
+        mean = statistics.mean(samples)
+        baseline = baseline or mean
+        print(f"{workers:>7} {mean:>9.0f} {baseline / mean:>7.2f}x {len(words):>6}")
+
+
+def cmd_locate(args):
+    """End-to-end time of a streaming locate vs a full tiled OCR, both from a cold cache.
+
+    Both include building the CandidateSet the caller gets back.
+    """
+    source = cw.create_screen_source(args.source)
+    frames = [source.grab() for _ in range(args.frames)]
+    source.close()
+
+    timings = {name: [] for name in ("full_ocr", "first_match", "locate_miss")}
+    early = 0
+    tiles_read = 0
+    for frame in frames:
+        cache = cw.TileOcrCache(tile_size=args.tile_size)
+        t0 = time.perf_counter()
+        cw.CandidateSet(cache.ocr(frame))
+        timings["full_ocr"].append((time.perf_counter() - t0) * 1000.0)
+
+        locator = cw.StreamingLocator(args.target, cache=cw.TileOcrCache(tile_size=args.tile_size))
+        locator.run(frame)
+        if locator.first_match_ms is None:
+            timings["locate_miss"].append(locator.total_ms)
+        else:
+            timings["first_match"].append(locator.total_ms)
+        early += 1 if locator.stopped_early else 0
+        tiles_read += locator.tiles_read
+
+    _print_table(timings)
+    print(f"\n{args.frames} frames, target {args.target!r}: {early} stopped early, "
+          f"{tiles_read / max(1, args.frames):.1f} tiles read per locate")
+
+
+def cmd_ocr_preprocess(args):
+    """Latency and target match rate of each OCR preprocessing combination"""
+    source = cw.create_screen_source(args.source)
+    frames = [source.grab() for _ in range(args.frames)]
+    source.close()
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    specs = args.specs or ["none"] + [
+        ",".join(["gray"] + steps + ([f"scale={scale:g}"] if scale != 1.0 else []))
+        for steps in ([], ["invert"], ["binarize"], ["invert", "binarize"])
+        for scale in args.scales]
+
+    print(f"{'preprocessing':<32} {'mean ms':>8} {'p95 ms':>8} {'words':>6} {'matched':>8}")
+    for spec in specs:
+        preprocessor = cw.create_ocr_preprocessor(spec)
+        samples = []
+        words = 0
+        found = 0
+        for frame in frames:
+            t0 = time.perf_counter()
+            candidates = cw.CandidateSet(cw.extract_ocr_candidates(frame, preprocessor=preprocessor))
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            words += len(candidates)
+            found += sum(1 for target in targets if cw.StreamingLocator(target).confident_matches(candidates))
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        rate = f"{found}/{len(targets) * len(frames)}" if targets else "-"
+        print(f"{preprocessor.spec:<32} {statistics.mean(ordered):>8.0f} {p95:>8.0f} "
+              f"{words // max(1, len(frames)):>6} {rate:>8}")
+
+
+class _StubGeminiHandler(BaseHTTPRequestHandler):
+    """Answers every generateContent call with a fixed reply, over keep-alive HTTP/1.1"""
+    protocol_version = "HTTP/1.1"
+    BODY = json.dumps({"candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]},
+                                       "finishReason": "STOP"}]}).encode()
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.BODY)))
+        self.end_headers()
+        self.wfile.write(self.BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def cmd_genai_client(args):
+    """Per-call overhead of a new genai client per request vs the shared client pool"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGeminiHandler)
+    server.connections = 0
+    server.delay = args.delay_ms / 1000.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_options = {"base_url": f"http://127.0.0.1:{server.server_address[1]}"}
+    api_key = "benchmark-key-0000"
+
+    def call(client):
+        return client.models.generate_content(model="gemini-2.0-flash", contents=["ping"]).text
+
+    timings = {}
+    connections = {}
+    for mode in ("per_call", "pooled"):
+        pool = cw.GenaiClientPool(http_options)
+        server.connections = 0
+        samples = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            if mode == "per_call":
+                client = cw.genai.Client(api_key=api_key, http_options=http_options)
+                call(client)
+                client.close()
+            else:
+                call(pool.get(api_key))
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        pool.close()
+        timings[mode] = samples[1:] if len(samples) > 1 else samples  # Drop the first (imports, first connect)
+        connections[mode] = server.connections
+    server.shutdown()
+
+    _print_table(timings)
+    print(f"\n{args.calls} calls each to a local stub ({args.delay_ms:.0f} ms server time); "
+          f"TCP connections opened: per_call {connections['per_call']}, pooled {connections['pooled']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="save frames from a screen source")
+    record.add_argument("directory")
+    record.add_argument("--source", default=None, help='"pil" or "mss" (default: AI_ASSISTANT_SCREEN_SOURCE)')
+    record.add_argument("--count", type=int, default=20)
+    record.add_argument("--interval", type=float, default=0.5, help="seconds between frames")
+    record.set_defaults(func=cmd_record)
+
+    pipeline = sub.add_parser("pipeline", help="time grab, diff, hash and upload encoding per frame")
+    pipeline.add_argument("--source", default=None, help='"pil", "mss" or "replay:<path>"')
+    pipeline.add_argument("--frames", type=int, default=50)
+    pipeline.add_argument("--kind", default="analysis", choices=sorted(cw.VisionPayloadPolicy.MAX_EDGE))
+    pipeline.set_defaults(func=cmd_pipeline)
+
+    ocr_cache = sub.add_parser("ocr-cache", help="compare full-screen OCR with the incremental tile cache")
+    ocr_cache.add_argument("--source", default=None, help='"pil", "mss" or "replay:<path>"')
+    ocr_cache.add_argument("--frames", type=int, default=10)
+    ocr_cache.add_argument("--full-frames", type=int, default=3, help="frames to also OCR uncached")
+    ocr_cache.add_argument("--tile-size", type=int, default=512)
+    ocr_cache.set_defaults(func=cmd_ocr_cache)
+
+    engines = sub.add_parser("ocr-engines", help="compare the pytesseract and tesserocr backends")
+    engines.add_argument("--source", default=None, help='"pil", "mss" or "replay:<path>"')
+    engines.add_argument("--frames", type=int, default=3)
+    engines.add_argument("--repeat", type=int, default=3)
+    engines.add_argument("--crop", type=int, default=0, help="OCR only the top-left NxN pixels")
+    engines.set_defaults(func=cmd_ocr_engines)
+
+    scaling = sub.add_parser("ocr-scaling", help="tiled OCR speedup over 1..N worker processes")
+    scaling.add_argument("--source", default=None, help='"pil", "mss" or "replay:<path>"')
+    scaling.add_argument("--frames", type=int, default=2)
+    scaling.add_argument("--max-workers", type=int, default=0, help="default: CPU count")
+    scaling.add_argument("--tile-size", type=int, default=512)
+    scaling.add_argument("--band-height", type=int, default=None, help="use full-width bands of this height")
+    scaling.set_defaults(func=cmd_ocr_scaling)
+
+    preprocess = sub.add_parser("ocr-preprocess", help="compare OCR preprocessing combinations")
+    preprocess.add_argument("--source", default=None, help='"pil", "mss" or "replay:<path>"')
+    preprocess.add_argument("--frames", type=int, default=3)
+    preprocess.add_argument("--targets", default="",
+                            help="comma-separated texts expected on every frame (match rate column)")
+    preprocess.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5, 2.0])
+    preprocess.add_argument("--spec", dest="specs", action="append",
+                            help='only this combination, e.g. "gray,invert,scale=0.5" (repeatable)')
+    preprocess.set_defaults(func=cmd_ocr_preprocess)
+
+    locate = sub.add_parser("locate", help="time to first match of a streaming locate vs full OCR")
+    locate.add_argument("target", help='text to find, e.g. "Settings"')
+    locate.add_argument("--source", default=None, help='"pil", "mss" or "replay:<path>"')
+    locate.add_argument("--frames", type=int, default=3)
+    locate.add_argument("--tile-size", type=int, default=512)
+    locate.set_defaults(func=cmd_locate)
+
+    genai_client = sub.add_parser("genai-client", help="per-request client setup vs the shared client pool")
+    genai_client.add_argument("--calls", type=int, default=50)
+    genai_client.add_argument("--delay-ms", type=float, default=0.0, help="simulated server time per call")
+    genai_client.set_defaults(func=cmd_genai_client)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,15 @@
 import sys
 import os
-import tempfile
 import io
+import re
+import time
+import threading
+import queue
+import hashlib
+import sqlite3
+import multiprocessing
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
                              QTextEdit, QLineEdit, QPushButton, QLabel, QScrollArea, QDialog, QSizeGrip, QMenu)
@@ -12,6 +20,12 @@ from PyQt5.QtGui import (QPainter, QBrush, QColor, QFont, QLinearGradient,
 from PyQt5.QtWidgets import QGraphicsDropShadowEffect, QGraphicsBlurEffect
 from google import genai
 import shutil
+
+if "--multiprocessing-fork" in getattr(sys, "orig_argv", sys.argv):
+    # Spawned OcrPool worker (this import runs before its initializer): OpenMP reads
+    # OMP_THREAD_LIMIT once, when Tesseract's library loads with the tesserocr import below
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
 import pytesseract
 
 def find_tesseract():
@@ -45,6 +59,15 @@ else:
     # We don't crash here, but OCR functions will fail if called
 
 from PIL import ImageGrab, Image
+import numpy as np
+try:
+    import mss  # Optional: faster shared-memory screen grabs
+except ImportError:
+    mss = None
+try:
+    import tesserocr  # Optional: in-process Tesseract, no subprocess per OCR call
+except ImportError:
+    tesserocr = None
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception, RetryCallState
 import json
 import logging
@@ -245,6 +268,601 @@ class GuidedTaskController:
         return self.advance_step()
 
 
+# ==================== SCREEN DIFFING ====================
+
+# Per-pixel tile weights, cached per tile size. Weights are odd so that any
+# single-pixel change is guaranteed to change its tile hash.
+_TILE_HASH_WEIGHTS = {}
+
+
+def _tile_hash_weights(tile_size):
+    weights = _TILE_HASH_WEIGHTS.get(tile_size)
+    if weights is None:
+        rng = np.random.default_rng(0x5EED)
+        weights = rng.integers(1, 2 ** 31, size=(tile_size, tile_size), dtype=np.uint32) | 1
+        _TILE_HASH_WEIGHTS[tile_size] = weights
+    return weights
+
+
+def compute_tile_hashes(image, tile_size=64):
+    """Hash every tile of a frame in one vectorized pass.
+
+    Returns a (rows, cols) uint64 array. Edge tiles are zero-padded.
+    """
+    gray = np.asarray(image.convert("L"), dtype=np.uint8)
+    height, width = gray.shape
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+    pad_h = rows * tile_size - height
+    pad_w = cols * tile_size - width
+    if pad_h or pad_w:
+        gray = np.pad(gray, ((0, pad_h), (0, pad_w)))
+    tiles = gray.reshape(rows, tile_size, cols, tile_size)
+    weights = _tile_hash_weights(tile_size)
+    # uint8 * uint32 wraps in uint32, which is fine for a content hash
+    weighted = tiles * weights[None, :, None, :]
+    return weighted.sum(axis=(1, 3), dtype=np.uint64)
+
+
+def perceptual_hash(image, hash_size=8):
+    """Difference hash (dHash) of a frame as an int of hash_size**2 bits"""
+    small = image.resize((hash_size + 1, hash_size), Image.Resampling.BOX).convert("L")
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(hash_a, hash_b):
+    """Number of differing bits between two perceptual hashes"""
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class ScreenDiff:
+    """Data class describing which tiles changed between two frames"""
+    def __init__(self, tile_size, frame_size, changed_tiles, frame_hash, noise_tiles=2):
+        self.tile_size = tile_size
+        self.frame_size = frame_size  # (width, height) in screenshot pixels
+        self.changed_tiles = changed_tiles  # set of (row, col)
+        self.frame_hash = frame_hash
+        # A blinking caret or clock tick touches a tile, or two when it straddles a tile edge.
+        # Guided step completion compares tiles itself, so one-tile toggles still finish a step.
+        self.significant = len(changed_tiles) > noise_tiles
+        self.bbox = self._boundingRegion()
+
+    def tileRect(self, row, col):
+        """Tile bounds as (left, top, width, height), clipped to the frame"""
+        frame_w, frame_h = self.frame_size
+        left = col * self.tile_size
+        top = row * self.tile_size
+        return (left, top, min(self.tile_size, frame_w - left), min(self.tile_size, frame_h - top))
+
+    def changedRects(self):
+        """Bounds of every changed tile"""
+        return [self.tileRect(r, c) for r, c in sorted(self.changed_tiles)]
+
+    def _boundingRegion(self):
+        if not self.changed_tiles:
+            return None
+        rows = [r for r, _ in self.changed_tiles]
+        cols = [c for _, c in self.changed_tiles]
+        left, top, _, _ = self.tileRect(min(rows), min(cols))
+        right_l, bottom_t, right_w, bottom_h = self.tileRect(max(rows), max(cols))
+        return (left, top, right_l + right_w - left, bottom_t + bottom_h - top)
+
+
+class TileDiffEngine:
+    """Compare consecutive frames tile by tile and report the dirty region"""
+    def __init__(self, tile_size=64, noise_tiles=2):
+        self.tile_size = tile_size
+        self.noise_tiles = noise_tiles  # Changes touching this many tiles or fewer are noise
+        self.previous_hashes = None
+
+    def reset(self):
+        """Forget the previous frame so the next one counts as fully changed"""
+        self.previous_hashes = None
+
+    def diff(self, image):
+        """Diff a Frame (reusing its cached tile hashes) or PIL image against the previous one"""
+        if isinstance(image, Frame):
+            hashes = image.tile_hashes(self.tile_size)
+        else:
+            hashes = compute_tile_hashes(image, self.tile_size)
+        return self.diff_hashes(hashes, image.size)
+
+    def diff_hashes(self, hashes, frame_size):
+        """Diff precomputed tile hashes against the previous frame"""
+        previous = self.previous_hashes
+        if previous is None or previous.shape != hashes.shape:
+            changed = {(r, c) for r in range(hashes.shape[0]) for c in range(hashes.shape[1])}
+        else:
+            changed = {(int(r), int(c)) for r, c in np.argwhere(hashes != previous)}
+        self.previous_hashes = hashes
+        return ScreenDiff(self.tile_size, frame_size, changed, hash(hashes.tobytes()), self.noise_tiles)
+
+
+# ==================== SCREEN CAPTURE ====================
+
+class ScreenSource:
+    """Where screen frames come from; grab() returns an RGB PIL image"""
+    name = "base"
+
+    def grab(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PilScreenSource(ScreenSource):
+    """PIL.ImageGrab of the primary screen (the original capture path)"""
+    name = "pil"
+
+    def grab(self):
+        return ImageGrab.grab()
+
+
+class MssScreenSource(ScreenSource):
+    """Shared-memory grabs through mss; noticeably cheaper per frame than ImageGrab"""
+    name = "mss"
+
+    def __init__(self, monitor=1):
+        if mss is None:
+            raise RuntimeError("mss is not installed")
+        self.monitor = monitor
+        self._local = threading.local()  # mss handles must not cross threads
+        self._handles = []
+        self._lock = threading.Lock()
+
+    def _handle(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._handles.append(sct)
+        return sct
+
+    def grab(self):
+        sct = self._handle()
+        shot = sct.grab(sct.monitors[self.monitor])
+        return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+    def close(self):
+        with self._lock:
+            for sct in self._handles:
+                try:
+                    sct.close()
+                except Exception:
+                    pass
+            self._handles = []
+
+
+class ReplayScreenSource(ScreenSource):
+    """Replays recorded frames from an image file or a directory (sorted by name).
+
+    Used to run and benchmark the capture pipeline without a display.
+    """
+    name = "replay"
+    EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+    def __init__(self, path, loop=True):
+        if os.path.isdir(path):
+            self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(self.EXTENSIONS))
+        else:
+            self.paths = [path]
+        if not self.paths:
+            raise ValueError(f"No replay frames found in {path}")
+        self.loop = loop
+        self.index = 0
+        self._lock = threading.Lock()
+
+    def grab(self):
+        with self._lock:
+            if self.index >= len(self.paths):
+                if not self.loop:
+                    raise EOFError("Replay source exhausted")
+                self.index = 0
+            path = self.paths[self.index]
+            self.index += 1
+        with Image.open(path) as image:
+            return image.convert("RGB")
+
+    def __len__(self):
+        return len(self.paths)
+
+
+def create_screen_source(spec=None):
+    """Build a ScreenSource from "pil", "mss" or "replay:<path>".
+
+    Defaults to AI_ASSISTANT_SCREEN_SOURCE, then "pil". Falls back to PIL
+    when the requested backend is unavailable.
+    """
+    spec = spec or os.environ.get('AI_ASSISTANT_SCREEN_SOURCE') or "pil"
+    try:
+        if spec == "mss":
+            return MssScreenSource()
+        if spec.startswith("replay:"):
+            return ReplayScreenSource(spec[len("replay:"):])
+        if spec != "pil":
+            print(f"Unknown screen source '{spec}', using PIL")
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"Screen source '{spec}' unavailable ({e}), using PIL")
+    return PilScreenSource()
+
+
+screen_source = create_screen_source()
+
+
+def mask_regions(image, rects, fallback=None):
+    """Paint over rects (left, top, right, bottom) in place.
+
+    Pixels are copied from the fallback frame when one is given, otherwise the
+    region is filled with the median color of its surrounding border so OCR
+    sees a blank area instead of our own UI.
+    """
+    img_w, img_h = image.size
+    pixels = None
+    for rect in rects:
+        left, top = max(0, int(rect[0])), max(0, int(rect[1]))
+        right, bottom = min(img_w, int(rect[2])), min(img_h, int(rect[3]))
+        if right <= left or bottom <= top:
+            continue
+        box = (left, top, right, bottom)
+        if fallback is not None:
+            image.paste(fallback.crop(box), box)
+            continue
+        if pixels is None:
+            pixels = np.asarray(image.convert("RGB"))
+        ring = []
+        if top > 0:
+            ring.append(pixels[top - 1, left:right])
+        if bottom < img_h:
+            ring.append(pixels[bottom, left:right])
+        if left > 0:
+            ring.append(pixels[top:bottom, left - 1])
+        if right < img_w:
+            ring.append(pixels[top:bottom, right])
+        color = tuple(int(v) for v in np.median(np.concatenate(ring), axis=0)) if ring else (0, 0, 0)
+        if image.mode != "RGB":
+            color = color[0] if image.mode in ("L", "P") else color + (255,)
+        image.paste(color, box)
+    return image
+
+
+def _rects_intersect(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class WindowMasker:
+    """Paints our own windows out of captures, shared by monitoring and on-demand grabs.
+
+    The GUI thread publishes where our windows are with set_rects(); apply()
+    may run on any thread. Masked areas are filled from the previous capture
+    when it is recent and was not covered there, otherwise with a flat border
+    color. A rect filled from the previous capture looks different from the
+    flat fill it gets on the next one; mask() reports such captures as unstable.
+    """
+    def __init__(self, fill_max_age=10.0):
+        self.fill_max_age = fill_max_age  # Seconds a previous capture may be reused as fill
+        self._rects = []
+        self._last_clean = None  # (image, masked rects, monotonic time)
+        self._lock = threading.Lock()
+
+    def set_rects(self, rects):
+        """Our windows as (left, top, right, bottom) screenshot pixels"""
+        with self._lock:
+            self._rects = list(rects)
+
+    def apply(self, screenshot):
+        """Mask screenshot in place and remember it as the next fill source"""
+        return self.mask(screenshot)[0]
+
+    def mask(self, screenshot):
+        """Like apply(), but returns (screenshot, masked rects, stable).
+
+        stable is False when a rect was filled from the previous capture: the
+        next capture of the same screen gets the flat color there instead.
+        """
+        with self._lock:
+            rects = self._rects
+            previous = self._last_clean
+            fill_rects = []
+            blank_rects = []
+            for rect in rects:
+                if (previous and previous[0].size == screenshot.size
+                        and time.monotonic() - previous[2] <= self.fill_max_age
+                        and not any(_rects_intersect(rect, old) for old in previous[1])):
+                    fill_rects.append(rect)
+                else:
+                    blank_rects.append(rect)
+            if fill_rects:
+                mask_regions(screenshot, fill_rects, fallback=previous[0])
+            if blank_rects:
+                mask_regions(screenshot, blank_rects)
+            # Captures are read-only once masked, so no copy is needed
+            self._last_clean = (screenshot, rects, time.monotonic())
+        return screenshot, tuple(rects), not fill_rects
+
+
+def foreground_window_rect(exclude_pid=None):
+    """Bounds (left, top, right, bottom) of the topmost visible app window, skipping our own process.
+
+    Windows only; returns None elsewhere or when no window qualifies.
+    """
+    window = _foreground_window(exclude_pid)
+    return window[0] if window else None
+
+
+def foreground_app_name(exclude_pid=None):
+    """Executable name (e.g. "explorer.exe") of the topmost visible app window; None when unknown"""
+    window = _foreground_window(exclude_pid)
+    if not window:
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, window[1])  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return None
+        try:
+            buffer = ctypes.create_unicode_buffer(260)
+            size = wintypes.DWORD(len(buffer))
+            if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                return None
+            return os.path.basename(buffer.value).lower()
+        finally:
+            kernel32.CloseHandle(handle)
+    except Exception:
+        return None
+
+
+def _foreground_window(exclude_pid=None):
+    """((left, top, right, bottom), pid) of the topmost visible app window, or None"""
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        exclude_pid = os.getpid() if exclude_pid is None else exclude_pid
+        found = []
+
+        @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        def _visit(hwnd, _):
+            if not user32.IsWindowVisible(hwnd) or user32.IsIconic(hwnd):
+                return True
+            if user32.GetWindowTextLengthW(hwnd) == 0:
+                return True
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            if pid.value == exclude_pid:
+                return True
+            rect = wintypes.RECT()
+            user32.GetWindowRect(hwnd, ctypes.byref(rect))
+            if rect.right - rect.left < 50 or rect.bottom - rect.top < 50:
+                return True
+            found.append(((rect.left, rect.top, rect.right, rect.bottom), pid.value))
+            return False  # EnumWindows walks in z-order; the first match is on top
+
+        user32.EnumWindows(_visit, 0)
+        return found[0] if found else None
+    except Exception:
+        return None
+
+
+class Frame:
+    """One screenshot plus its derived artifacts, each computed lazily and at most once.
+
+    Frames are shared between the capture thread, the GUI thread and workers,
+    so memoization is guarded by a per-artifact lock. Treat the image and all
+    returned artifacts as read-only.
+    """
+    def __init__(self, image, seq=0, timestamp=None):
+        self.image = image
+        self.seq = seq
+        self.timestamp = timestamp or datetime.now()
+        self.screen_diff = None  # Set by the capture worker for monitoring frames
+        self.masked_rects = ()  # Our own windows painted out of the image (see WindowMasker)
+        self.mask_stable = True  # False if the next capture of this screen will be masked differently
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def wrap(cls, image):
+        """Return image as a Frame (None and existing Frames pass through)"""
+        if image is None or isinstance(image, Frame):
+            return image
+        return cls(image)
+
+    @property
+    def size(self):
+        return self.image.size
+
+    @property
+    def width(self):
+        return self.image.width
+
+    @property
+    def height(self):
+        return self.image.height
+
+    def _memo(self, key, compute):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+            return self._cache[key]
+
+    def thumbnail(self, size=(64, 64)):
+        """Small copy of the frame (aspect ratio kept)"""
+        def compute():
+            thumb = self.image.copy()
+            thumb.thumbnail(size, Image.Resampling.BOX)
+            return thumb
+        return self._memo(("thumbnail", tuple(size)), compute)
+
+    def gray(self):
+        """Full-resolution grayscale copy"""
+        return self._memo("gray", lambda: self.image.convert("L"))
+
+    def phash(self, hash_size=8):
+        """Perceptual (difference) hash, see perceptual_hash()"""
+        return self._memo(("phash", hash_size), lambda: perceptual_hash(self.image, hash_size))
+
+    def tile_hashes(self, tile_size=64):
+        """Per-tile content hashes, see compute_tile_hashes()"""
+        return self._memo(("tiles", tile_size), lambda: compute_tile_hashes(self.gray(), tile_size))
+
+    def ocr_candidates(self):
+        """OCR word boxes as a CandidateSet (shared, read-only)"""
+        return self._memo("ocr", lambda: CandidateSet(ocr_cache.ocr(self.image, self.gray())))
+
+    def encoded(self, encoder, transform):
+        """(bytes, mime_type) of the upload payload for this encoder and transform"""
+        key = ("encoded", encoder.fmt, encoder.quality, encoder.compress_level,
+               transform.crop_box, transform.payload_size)
+        return self._memo(key, lambda: encoder.encode(transform.apply(self.image)))
+
+
+class FrameRing:
+    """Bounded, thread-safe ring of the most recent captures.
+
+    The capture thread only ever publishes complete frames, so the GUI can
+    read the newest slot while the next one is being filled.
+    """
+    def __init__(self, capacity=4):
+        self._frames = deque(maxlen=max(2, capacity))
+        self._lock = threading.Lock()
+
+    def push(self, frame):
+        with self._lock:
+            self._frames.append(frame)
+
+    def latest(self):
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def since(self, seq):
+        """Frames newer than seq, oldest first"""
+        with self._lock:
+            return [f for f in self._frames if f.seq > seq]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+class AdaptiveCaptureScheduler:
+    """Pick the next capture interval from recent screen activity.
+
+    Polls fast for a few seconds after a change (or an explicit boost when a
+    step overlay is shown), then backs off exponentially to a ceiling.
+    """
+    def __init__(self, fast_ms=250, max_ms=6000, boost_seconds=3.0, backoff=2.0):
+        self.fast_ms = fast_ms
+        self.max_ms = max_ms
+        self.boost_seconds = boost_seconds
+        self.backoff = backoff
+        self.interval_ms = fast_ms
+        self.capture_count = 0
+        self.changed_count = 0
+        self._boost_until = 0.0
+        self._lock = threading.Lock()
+
+    def boost(self):
+        """Poll fast for the next boost_seconds"""
+        with self._lock:
+            self._boost_until = time.monotonic() + self.boost_seconds
+            self.interval_ms = self.fast_ms
+
+    def record(self, changed):
+        """Record a capture and return the interval until the next one"""
+        with self._lock:
+            self.capture_count += 1
+            now = time.monotonic()
+            if changed:
+                self.changed_count += 1
+                self._boost_until = now + self.boost_seconds
+                self.interval_ms = self.fast_ms
+            elif now >= self._boost_until:
+                self.interval_ms = min(self.max_ms, int(self.interval_ms * self.backoff))
+            return self.interval_ms
+
+    def stats(self):
+        """Current (interval_ms, capture_count, changed_count)"""
+        with self._lock:
+            return self.interval_ms, self.capture_count, self.changed_count
+
+
+class ScreenCaptureWorker(QThread):
+    """Background thread that grabs, diffs and hashes frames into a FrameRing"""
+    frame_ready = pyqtSignal(int)  # Sequence number of the newest frame
+    
+    def __init__(self, ring, scheduler, phash_size=8, source=None, masker=None):
+        super().__init__()
+        self.source = source or screen_source
+        self.masker = masker  # Optional WindowMasker that paints our own windows out of each frame
+        self.ring = ring
+        self.scheduler = scheduler
+        self.phash_size = phash_size
+        self.differ = TileDiffEngine()
+        self._seq = 0
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            interval_ms = self.scheduler.interval_ms
+            try:
+                interval_ms = self._captureOnce()
+            except Exception as e:
+                print(f"Screen capture failed: {e}")
+            remaining = interval_ms / 1000.0 - (time.monotonic() - started)
+            if remaining > 0:
+                self._wake_event.wait(remaining)
+            self._wake_event.clear()
+
+    def _captureOnce(self):
+        self._seq += 1
+        image = self.source.grab()
+        masked_rects, mask_stable = (), True
+        if self.masker:
+            image, masked_rects, mask_stable = self.masker.mask(image)
+        frame = Frame(image, seq=self._seq)
+        frame.masked_rects = masked_rects
+        frame.mask_stable = mask_stable
+        frame.screen_diff = self.differ.diff(frame)
+        frame.phash(self.phash_size)  # Warm the cache off the GUI thread
+        self.ring.push(frame)
+        interval_ms = self.scheduler.record(frame.screen_diff.significant)
+        self.frame_ready.emit(self._seq)
+        return interval_ms
+
+    def trigger(self):
+        """Capture as soon as possible instead of waiting for the interval"""
+        self._wake_event.set()
+
+    def boost(self):
+        """Switch to fast polling and capture right away"""
+        self.scheduler.boost()
+        self.trigger()
+
+    def stop(self):
+        """Stop the loop and wait for the thread to exit"""
+        self._stop_event.set()
+        self._wake_event.set()
+        self.wait()
+
+
 class GlassmorphismTitleBar(QWidget):
     """Title bar with minimalist floating design"""
     def paintEvent(self, event):
@@ -448,19 +1066,1806 @@ class SettingsDialog(QDialog):
         return self.api_key
 
 
+# ==================== FUZZY MATCHING ====================
+
+def bounded_levenshtein(a, b, max_distance):
+    """Levenshtein distance of a and b, or max_distance + 1 once it is known to exceed max_distance.
+
+    Only the diagonal band of width 2 * max_distance + 1 is computed, and the
+    scan stops as soon as a whole row is over the limit.
+    """
+    if a == b:
+        return 0
+    over = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return over
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return len(b)
+    prev = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        cur = [over] * (len(b) + 1)
+        if i <= max_distance:
+            cur[0] = i
+        row_min = cur[0]
+        char = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (char != b[j - 1]))
+            cur[j] = value if value < over else over
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        prev = cur
+    return prev[-1]
+
+
+def _deletes(word, depth):
+    """word plus every string obtained by deleting up to depth characters"""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+class DeletionIndex:
+    """SymSpell-style index for "within k edits" lookups over a vocabulary.
+
+    Two strings are within k edits only if deleting at most k characters
+    from each yields a common string, so a query only looks up its own
+    deletion variants and verifies the few words they point to.
+    """
+    def __init__(self, words=(), max_distance=2):
+        self.max_distance = max_distance
+        self.variants = {}  # deletion variant -> [words]
+        for word in words:
+            for variant in _deletes(word, max_distance):
+                self.variants.setdefault(variant, []).append(word)
+
+    def query(self, word, max_distance=None):
+        """All indexed words within max_distance (at most the build distance) edits of word"""
+        k = self.max_distance if max_distance is None else max_distance
+        if k > self.max_distance:
+            raise ValueError(f"Index was built for distance <= {self.max_distance}")
+        seen = set()
+        found = []
+        for variant in _deletes(word, k):
+            for candidate in self.variants.get(variant, ()):
+                if candidate not in seen:
+                    seen.add(candidate)
+                    if bounded_levenshtein(word, candidate, k) <= k:
+                        found.append(candidate)
+        return found
+
+
+# ==================== OCR ====================
+
+def candidates_from_ocr_data(data, offset=(0, 0), start_id=1):
+    """Turn pytesseract image_to_data output into candidate dicts.
+
+    offset is added to every box, for OCR run on a crop of the screenshot.
+    """
+    candidates = []
+    ocr_id = start_id
+    n = len(data.get("text", []))
+    for i in range(n):
+        text = data["text"][i].strip()
+        if not text:
+            continue
+        conf_raw = data.get("conf", [0])[i]
+        try:
+            conf_val = float(conf_raw)
+        except Exception:
+            conf_val = -1.0
+        conf = max(0.0, min(1.0, conf_val / 100.0)) if conf_val >= 0 else 0.0
+        left = int(data["left"][i]) + offset[0]
+        top = int(data["top"][i]) + offset[1]
+        width = int(data["width"][i])
+        height = int(data["height"][i])
+        candidate = {
+            "ocr_id": ocr_id,
+            "text": text,
+            "left": left,
+            "top": top,
+            "width": width,
+            "height": height,
+            "confidence": conf
+        }
+        if "line_num" in data:
+            # Which Tesseract line the word belongs to (used to rebuild phrases)
+            candidate["line_key"] = (int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]))
+        candidates.append(candidate)
+        ocr_id += 1
+    return candidates
+
+
+class OcrProfile:
+    """Tesseract settings for one kind of page: page segmentation mode, engine mode and extra scale.
+
+    None for psm/oem means Tesseract's default. scale multiplies the
+    preprocessor's own scale.
+    """
+    __slots__ = ("psm", "oem", "scale")
+
+    def __init__(self, psm=None, oem=None, scale=1.0):
+        self.psm = psm
+        self.oem = oem
+        self.scale = scale
+
+    @property
+    def key(self):
+        return (self.psm, self.oem, self.scale)
+
+    @property
+    def is_default(self):
+        return self.psm is None and self.oem is None and self.scale == 1.0
+
+    @property
+    def config(self):
+        """Command-line flags for the tesseract executable"""
+        flags = []
+        if self.psm is not None:
+            flags.append(f"--psm {self.psm}")
+        if self.oem is not None:
+            flags.append(f"--oem {self.oem}")
+        return " ".join(flags)
+
+    def to_dict(self):
+        return {"psm": self.psm, "oem": self.oem, "scale": self.scale}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("psm"), data.get("oem"), float(data.get("scale", 1.0)))
+
+    def __eq__(self, other):
+        return isinstance(other, OcrProfile) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"OcrProfile(psm={self.psm}, oem={self.oem}, scale={self.scale:g})"
+
+
+class OcrEngine:
+    """Tesseract backend; image_to_data() returns a pytesseract-style DICT"""
+    name = "base"
+    process_per_call = False  # Whether every call pays Tesseract's startup (fewer, larger calls win)
+
+    def image_to_data(self, image, profile=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    """Runs the tesseract executable once per call (the original behaviour)"""
+    name = "pytesseract"
+    process_per_call = True
+
+    def image_to_data(self, image, profile=None):
+        config = profile.config if profile else ""
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+
+
+class TesserocrEngine(OcrEngine):
+    """Long-lived in-process Tesseract APIs through tesserocr.
+
+    The language model is loaded once per API instead of once per call.
+    An API is not thread-safe, so calls borrow one from a small pool.
+    The engine mode is fixed when an API is created, so a profile's oem is
+    ignored here; its page segmentation mode is applied per call.
+    """
+    name = "tesserocr"
+    TSV_COLUMNS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+                   "left", "top", "width", "height", "conf", "text")
+
+    def __init__(self, lang="eng", pool_size=1):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        kwargs = {"lang": lang}
+        if tess_path:
+            tessdata = os.path.join(os.path.dirname(tess_path), "tessdata")
+            if os.path.isdir(tessdata):
+                kwargs["path"] = tessdata
+        self._apis = queue.Queue()
+        self._all = []
+        for _ in range(max(1, pool_size)):
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._all.append(api)
+            self._apis.put(api)
+
+    def image_to_data(self, image, profile=None):
+        api = self._apis.get()
+        try:
+            psm = profile.psm if profile and profile.psm is not None else tesserocr.PSM.AUTO
+            api.SetPageSegMode(psm)
+            api.SetImage(image)
+            tsv = api.GetTSVText(0)
+        finally:
+            self._apis.put(api)
+        return self.parse_tsv(tsv)
+
+    @classmethod
+    def parse_tsv(cls, tsv):
+        """Parse Tesseract TSV rows (no header) into pytesseract's DICT layout"""
+        data = {column: [] for column in cls.TSV_COLUMNS}
+        numeric = cls.TSV_COLUMNS[:10]
+        for line in tsv.splitlines():
+            fields = line.split("\t")
+            if len(fields) < 11:
+                continue
+            fields += [""] * (12 - len(fields))
+            for column, value in zip(cls.TSV_COLUMNS, fields):
+                data[column].append(int(value) if column in numeric else value)
+        return data
+
+    def close(self):
+        for api in self._all:
+            api.End()
+        self._all = []
+
+
+def create_ocr_engine(name=None, pool_size=1):
+    """Build an OcrEngine by name ("tesserocr" or "pytesseract").
+
+    Defaults to AI_ASSISTANT_OCR_ENGINE, then tesserocr when installed.
+    Falls back to pytesseract when the requested backend is unavailable.
+    """
+    name = name or os.environ.get('AI_ASSISTANT_OCR_ENGINE') or ("tesserocr" if tesserocr else "pytesseract")
+    if name == "tesserocr":
+        try:
+            return TesserocrEngine(pool_size=pool_size)
+        except Exception as e:
+            print(f"OCR engine 'tesserocr' unavailable ({e}), using pytesseract")
+    elif name != "pytesseract":
+        print(f"Unknown OCR engine '{name}', using pytesseract")
+    return PytesseractEngine()
+
+
+ocr_engine = create_ocr_engine()
+
+
+_TOKEN_SPLIT = re.compile(r"[\W_]+")  # Word tokens used for OCR-id validation and ranking
+_TERM_SPLIT = re.compile(r"[\s\W]+")  # Terms used by the overlay/guided matchers (keeps underscores)
+
+
+def _trigrams(text):
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+class TermIndex:
+    """Inverted index from normalized strings to candidate positions.
+
+    A trigram index over the vocabulary answers substring lookups and a
+    deletion index answers edit-distance lookups, without touching every
+    candidate.
+    """
+    MAX_SUBSTRING_QUERY = 64  # Longer queries enumerate the vocabulary instead of their substrings
+
+    def __init__(self, terms_per_item):
+        self.postings = {}  # term -> [candidate positions]
+        for position, terms in enumerate(terms_per_item):
+            for term in terms:
+                self.postings.setdefault(term, []).append(position)
+        self.grams = {}  # trigram -> {terms}
+        for term in self.postings:
+            for gram in _trigrams(term):
+                self.grams.setdefault(gram, set()).add(term)
+        self._fuzzy = None
+        self._fuzzy_lock = threading.Lock()
+
+    def positions(self, terms):
+        """Sorted candidate positions of any of terms"""
+        found = set()
+        for term in terms:
+            found.update(self.postings.get(term, ()))
+        return sorted(found)
+
+    def containing(self, text):
+        """Vocabulary terms that contain text as a substring"""
+        grams = set(_trigrams(text))
+        if not grams:
+            return [term for term in self.postings if text in term]
+        pools = sorted((self.grams.get(gram, set()) for gram in grams), key=len)
+        shared = set(pools[0])
+        for pool in pools[1:]:
+            shared &= pool
+        return [term for term in shared if text in term]
+
+    def contained_in(self, text):
+        """Vocabulary terms that are substrings of text"""
+        if len(text) > self.MAX_SUBSTRING_QUERY:
+            return [term for term in self.postings if term in text]
+        substrings = {text[i:j] for i in range(len(text)) for j in range(i + 1, len(text) + 1)}
+        return [term for term in substrings if term in self.postings]
+
+    def fuzzy_index(self, max_distance=2):
+        """DeletionIndex over the vocabulary, built on first use"""
+        with self._fuzzy_lock:
+            if self._fuzzy is None or self._fuzzy.max_distance < max_distance:
+                self._fuzzy = DeletionIndex(self.postings, max(2, max_distance))
+            return self._fuzzy
+
+    def near(self, text, max_distance):
+        """Vocabulary terms within max_distance edits of text"""
+        return self.fuzzy_index(max_distance).query(text, max_distance)
+
+
+class PhraseIndex:
+    """Lines and multi-word phrases rebuilt from Tesseract's block/paragraph/line numbers.
+
+    Every run of up to MAX_WORDS consecutive words on a line is indexed by its
+    terms joined with spaces, so "Network & Internet" is found under
+    "network internet" in one lookup. Lines cut by an OCR tile border are
+    stitched back together when the pieces line up.
+    """
+    MAX_WORDS = 6
+
+    def __init__(self, candidate_set):
+        self.candidate_set = candidate_set
+        self.lines = self._stitch(self._group(candidate_set))
+        self.spans = {}  # "term term ..." -> [word positions]
+        for line in self.lines:
+            terms = [[t for t in _TERM_SPLIT.split(candidate_set.lowered[p]) if t] for p in line]
+            for start in range(len(line)):
+                if not terms[start]:
+                    continue
+                key_terms = []
+                for end in range(start, min(len(line), start + self.MAX_WORDS)):
+                    key_terms.extend(terms[end])
+                    if terms[end] and len(key_terms) >= 2:
+                        self.spans.setdefault(" ".join(key_terms), []).append(tuple(line[start:end + 1]))
+
+    @staticmethod
+    def _group(candidate_set):
+        """Word positions per OCR line, left to right"""
+        lines = {}
+        for position, key in enumerate(candidate_set.line_keys):
+            lines.setdefault(key if key is not None else ("word", position), []).append(position)
+        left = candidate_set.boxes[:, 1]
+        return [sorted(positions, key=lambda p: left[p]) for positions in lines.values()]
+
+    def _stitch(self, lines):
+        """Join line pieces whose end and start words sit side by side at the same height"""
+        boxes = self.candidate_set.boxes
+        starts = {}  # vertical bucket -> [line numbers]
+        for number, line in enumerate(lines):
+            first = boxes[line[0]]
+            starts.setdefault(int((first[2] + first[4] / 2) // 8), []).append(number)
+        following = {}
+        taken = set()
+        for number, line in enumerate(lines):
+            last = boxes[line[-1]]
+            center = last[2] + last[4] / 2
+            right = last[1] + last[3]
+            bucket = int(center // 8)
+            for other in (o for b in (bucket - 1, bucket, bucket + 1) for o in starts.get(b, ())):
+                if other == number or other in taken:
+                    continue
+                first = boxes[lines[other][0]]
+                height = max(last[4], first[4])
+                if abs(first[2] + first[4] / 2 - center) <= height / 2 and 0 <= first[1] - right <= 1.5 * height:
+                    following[number] = other
+                    taken.add(other)
+                    break
+        stitched = []
+        for number, line in enumerate(lines):
+            if number in taken:
+                continue
+            merged = list(line)
+            seen = {number}
+            while number in following and following[number] not in seen:
+                number = following[number]
+                seen.add(number)
+                merged.extend(lines[number])
+            stitched.append(merged)
+        return stitched
+
+    def lookup(self, terms):
+        """Word position tuples of phrases spelling out terms"""
+        return self.spans.get(" ".join(terms), [])
+
+
+class Candidate:
+    """Read-only view of one word in a CandidateSet; reads like the old candidate dict"""
+    __slots__ = ("owner", "index")
+    KEYS = ("ocr_id", "text", "left", "top", "width", "height", "confidence")
+
+    def __init__(self, owner, index):
+        self.owner = owner
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == "text":
+            return self.owner.texts[self.index]
+        if key == "confidence":
+            return float(self.owner.confidence[self.index])
+        column = CandidateSet.BOX_COLUMNS.get(key)
+        if column is None:
+            raise KeyError(key)
+        return int(self.owner.boxes[self.index, column])
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self):
+        return {key: self[key] for key in self.KEYS}
+
+    @property
+    def tokens(self):
+        return self.owner.tokens[self.index]
+
+    @property
+    def terms(self):
+        return self.owner.terms[self.index]
+
+    @property
+    def lowered(self):
+        return self.owner.lowered[self.index]
+
+    def __eq__(self, other):
+        return isinstance(other, Candidate) and other.owner is self.owner and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.owner), self.index))
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class CandidateSet:
+    """Columnar store of OCR words.
+
+    Boxes live in one int array and confidences in a float array; lowercased
+    text, tokens and terms are computed once. Indexing and iteration yield
+    Candidate views, so a CandidateSet stands in for the old list of dicts.
+    """
+    BOX_COLUMNS = {"ocr_id": 0, "left": 1, "top": 2, "width": 3, "height": 4}
+
+    def __init__(self, words=()):
+        words = list(words)
+        self.boxes = np.array([[w["ocr_id"], w["left"], w["top"], w["width"], w["height"]] for w in words],
+                              dtype=np.int64).reshape(len(words), 5)
+        self.confidence = np.array([w["confidence"] for w in words], dtype=np.float64)
+        self.texts = [w["text"] for w in words]
+        self.lowered = [text.lower().strip() for text in self.texts]
+        self.tokens = [tuple(t for t in _TOKEN_SPLIT.split(text) if t) for text in self.lowered]
+        self.terms = [frozenset(t for t in _TERM_SPLIT.split(text) if t) for text in self.lowered]
+        self.line_keys = [w.get("line_key") for w in words]  # None when OCR gave no line numbers
+        self.partial = False  # True when a StreamingLocator stopped before reading the whole frame
+        self._indexes = {}
+        self._index_lock = threading.Lock()
+
+    @classmethod
+    def coerce(cls, candidates):
+        """Return candidates as a CandidateSet (lists of dicts or views are converted)"""
+        if isinstance(candidates, cls):
+            return candidates
+        return cls(candidates or ())
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return (Candidate(self, i) for i in range(len(self.texts)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Candidate(self, i) for i in range(*index.indices(len(self.texts)))]
+        if index < 0:
+            index += len(self.texts)
+        if not 0 <= index < len(self.texts):
+            raise IndexError(index)
+        return Candidate(self, index)
+
+    @property
+    def areas(self):
+        return self.boxes[:, 3] * self.boxes[:, 4]
+
+    def views(self, indices):
+        return [Candidate(self, int(i)) for i in indices]
+
+    def smallest(self, mask=None, limit=None):
+        """Views selected by mask, smallest box first (ties keep OCR order)"""
+        indices = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        order = indices[np.argsort(self.areas[indices], kind="stable")]
+        return self.views(order[:limit])
+
+    def most_confident(self, limit=None):
+        """Views by descending confidence (ties keep OCR order)"""
+        return self.views(np.argsort(-self.confidence, kind="stable")[:limit])
+
+    def confident_mask(self, threshold):
+        return self.confidence >= threshold
+
+    def to_dicts(self, limit=None):
+        """Plain dicts, e.g. for JSON prompts"""
+        return [c.to_dict() for c in self[:limit]]
+
+    def _index(self, name, build):
+        with self._index_lock:
+            index = self._indexes.get(name)
+            if index is None:
+                index = build()
+                self._indexes[name] = index
+            return index
+
+    @property
+    def token_index(self):
+        """TermIndex over tokens"""
+        return self._index("tokens", lambda: TermIndex(self.tokens))
+
+    @property
+    def term_index(self):
+        """TermIndex over terms"""
+        return self._index("terms", lambda: TermIndex(self.terms))
+
+    @property
+    def text_index(self):
+        """TermIndex over each word's full lowercased text"""
+        return self._index("text", lambda: TermIndex([(text,) for text in self.lowered]))
+
+    @property
+    def phrase_index(self):
+        """PhraseIndex over reconstructed lines"""
+        return self._index("phrases", lambda: PhraseIndex(self))
+
+    def phrases(self, terms):
+        """Merged phrase candidates whose words spell out terms (in order)"""
+        return [self.merge(span) for span in self.phrase_index.lookup(terms)]
+
+    def merge(self, positions):
+        """One candidate dict covering several words (e.g. a phrase)"""
+        positions = list(positions)
+        boxes = self.boxes[positions]
+        left, top = int(boxes[:, 1].min()), int(boxes[:, 2].min())
+        right = int((boxes[:, 1] + boxes[:, 3]).max())
+        bottom = int((boxes[:, 2] + boxes[:, 4]).max())
+        return {
+            "ocr_id": int(boxes[0, 0]),
+            "text": " ".join(self.texts[p] for p in positions),
+            "left": left,
+            "top": top,
+            "width": right - left,
+            "height": bottom - top,
+            "confidence": float(self.confidence[positions].min())
+        }
+
+
+class OcrPreprocessor:
+    """Clean up an image before Tesseract reads it.
+
+    grayscale drops color; invert ("auto", True or False) turns light-on-dark
+    text (dark themes) into the dark-on-light text Tesseract expects, with
+    "auto" deciding per dark region (a dark sidebar next to a light pane is
+    inverted on its own); scale
+    resizes text toward the size Tesseract reads best (e.g. 0.5 on a 200%
+    display, 2.0 for tiny fonts); binarize applies a local-mean threshold
+    that copes with antialiasing and gradients. Boxes read from the result
+    are mapped back with to_source(). Every step is off by default, so
+    Tesseract gets the frame as captured until the ocr-preprocess benchmark
+    shows a combination reads better.
+    """
+    INVERT_BLOCK = 16  # Pixels per block when finding dark regions
+    INVERT_WINDOW = 5  # Blocks averaged across, so the strokes of large dark text don't count as a region
+
+    def __init__(self, grayscale=False, invert=False, binarize=False, scale=1.0, block_size=31, offset=10):
+        self.grayscale = grayscale
+        self.invert = invert
+        self.binarize = binarize
+        self.scale = scale
+        self.block_size = block_size | 1  # Odd, so the window is centered on the pixel
+        self.offset = offset  # How much darker than its surroundings a pixel must be to count as ink
+
+    @property
+    def spec(self):
+        """Text form accepted by create_ocr_preprocessor()"""
+        parts = []
+        if self.grayscale:
+            parts.append("gray")
+        if self.invert == "auto":
+            parts.append("invert")
+        elif self.invert:
+            parts.append("invert=always")
+        if self.binarize:
+            parts.append("binarize")
+        if self.scale != 1.0:
+            parts.append(f"scale={self.scale:g}")
+        return ",".join(parts) or "none"
+
+    def apply(self, image):
+        """(processed image, (sx, sy) scale actually applied)"""
+        width, height = image.size
+        if not (self.grayscale or self.invert or self.binarize):
+            processed = image
+        else:
+            processed = image.convert("L")
+            if self.invert:
+                pixels = np.asarray(processed)
+                dark = True if self.invert != "auto" else self._dark_regions(pixels)
+                if dark is True:
+                    processed = Image.fromarray(255 - pixels)
+                elif dark is not None:
+                    processed = Image.fromarray(np.where(dark, 255 - pixels, pixels).astype(np.uint8))
+        if self.scale != 1.0:
+            size = (max(1, int(round(width * self.scale))), max(1, int(round(height * self.scale))))
+            resample = Image.Resampling.LANCZOS if self.scale < 1.0 else Image.Resampling.BICUBIC
+            processed = processed.resize(size, resample)
+        if self.binarize:
+            processed = Image.fromarray(self._threshold(np.asarray(processed, dtype=np.float64)))
+        return processed, (processed.width / float(width), processed.height / float(height))
+
+    def _dark_regions(self, pixels):
+        """Mask of pixels on a dark background; True if all are, None if none are"""
+        b = self.INVERT_BLOCK
+        height, width = pixels.shape
+        padded = np.pad(pixels, ((0, -height % b), (0, -width % b)), mode="edge")
+        means = padded.reshape(padded.shape[0] // b, b, padded.shape[1] // b, b).mean(axis=(1, 3))
+        k = self.INVERT_WINDOW // 2
+        window = np.pad(means, k, mode="edge")
+        integral = np.zeros((window.shape[0] + 1, window.shape[1] + 1))
+        integral[1:, 1:] = window.cumsum(0).cumsum(1)
+        n = self.INVERT_WINDOW
+        local = (integral[n:, n:] - integral[:-n, n:] - integral[n:, :-n] + integral[:-n, :-n]) / float(n * n)
+        dark = local < 128
+        if dark.all():
+            return True
+        if not dark.any():
+            return None
+        return np.repeat(np.repeat(dark, b, axis=0), b, axis=1)[:height, :width]
+
+    def _threshold(self, pixels):
+        """Adaptive threshold: ink where a pixel is darker than its neighborhood mean"""
+        k = self.block_size // 2
+        padded = np.pad(pixels, k, mode="edge")
+        integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+        integral[1:, 1:] = padded.cumsum(0).cumsum(1)
+        b = self.block_size
+        sums = integral[b:, b:] - integral[:-b, b:] - integral[b:, :-b] + integral[:-b, :-b]
+        mean = sums / float(b * b)
+        return np.where(pixels < mean - self.offset, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def to_source(candidates, scale):
+        """Map candidate boxes from the processed image back to the original one (in place)"""
+        sx, sy = scale
+        if sx == 1.0 and sy == 1.0:
+            return candidates
+        for c in candidates:
+            left = int(round(c["left"] / sx))
+            top = int(round(c["top"] / sy))
+            c["width"] = max(1, int(round((c["left"] + c["width"]) / sx)) - left)
+            c["height"] = max(1, int(round((c["top"] + c["height"]) / sy)) - top)
+            c["left"] = left
+            c["top"] = top
+        return candidates
+
+    def scaled(self, factor):
+        """Copy of this preprocessor with its scale multiplied by factor"""
+        if factor == 1.0:
+            return self
+        return OcrPreprocessor(self.grayscale, self.invert, self.binarize, self.scale * factor,
+                               self.block_size, self.offset)
+
+    def __repr__(self):
+        return f"OcrPreprocessor({self.spec!r})"
+
+
+def create_ocr_preprocessor(spec=None):
+    """Build an OcrPreprocessor from a comma-separated spec, e.g. "gray,invert,binarize,scale=0.5".
+
+    Defaults to AI_ASSISTANT_OCR_PREPROCESS, then "none". "none" (or
+    "raw") passes frames through unchanged; "invert" inverts only dark
+    regions, "invert=always" inverts everything.
+    """
+    spec = spec if spec is not None else os.environ.get('AI_ASSISTANT_OCR_PREPROCESS', "none")
+    options = {"grayscale": False, "invert": False, "binarize": False, "scale": 1.0}
+    for part in spec.replace(" ", "").lower().split(","):
+        name, _, value = part.partition("=")
+        if name in ("", "none", "raw"):
+            continue
+        if name in ("gray", "grayscale"):
+            options["grayscale"] = True
+        elif name == "invert":
+            options["invert"] = True if value == "always" else "auto"
+        elif name == "binarize":
+            options["binarize"] = True
+        elif name == "scale":
+            try:
+                options["scale"] = float(value)
+            except ValueError:
+                print(f"Invalid OCR scale '{value}', ignoring")
+        else:
+            print(f"Unknown OCR preprocessing step '{name}', ignoring")
+    return OcrPreprocessor(**options)
+
+
+ocr_preprocessor = create_ocr_preprocessor()
+
+
+NOMINAL_TEXT_HEIGHT = 10  # Ink height in pixels of a line of ordinary UI text at 100% scaling
+TEXT_SCALE_STEPS = (1.0, 0.75, 2.0 / 3.0, 0.5)  # Downscale factors OCR may use (few, so cache keys stay stable)
+
+
+def estimate_text_height(gray, strips=8):
+    """Median height in pixels of text lines in a grayscale array; None if no text-like rows are found.
+
+    Samples a few narrow vertical strips: a row with strong contrast holds
+    ink, and each run of inked rows between blank ones is a line of text.
+    """
+    height, width = gray.shape
+    if height < 32 or width < 32:
+        return None
+    strip_w = max(16, width // (strips * 4))
+    runs = []
+    for i in range(strips):
+        left = min(width - strip_w, max(0, int((i + 0.5) * width / strips) - strip_w // 2))
+        strip = gray[:, left:left + strip_w]
+        inked = (strip.max(axis=1).astype(np.int16) - strip.min(axis=1)) > 60
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], inked.view(np.int8), [0]))))
+        lengths = edges[1::2] - edges[::2]
+        runs.extend(int(n) for n in lengths if 6 <= n <= 96)  # Skip specks and images
+    if len(runs) < 5:
+        return None
+    return float(np.median(runs))
+
+
+def estimate_text_scale(device_pixel_ratio=1.0):
+    """Factor (<= 1) to shrink a frame by on a HiDPI display; 1.0 at 100% scaling"""
+    if not device_pixel_ratio or device_pixel_ratio <= 1.1:
+        return 1.0
+    factor = 1.0 / device_pixel_ratio
+    return min(TEXT_SCALE_STEPS, key=lambda step: abs(step - factor))
+
+
+def measured_text_scale(gray):
+    """Factor the frame's measured text height alone would suggest (diagnostics only).
+
+    Large headings or a zoomed page also read as tall text on a 100% display,
+    so OCR only downscales when the device pixel ratio says so.
+    """
+    text_height = estimate_text_height(gray)
+    if not text_height or text_height < NOMINAL_TEXT_HEIGHT * 1.4:
+        return 1.0
+    factor = NOMINAL_TEXT_HEIGHT / text_height
+    return min(TEXT_SCALE_STEPS, key=lambda step: abs(step - factor))
+
+
+def snap_to_ink(gray, candidates, slack):
+    """Fit boxes read from a downscaled image to the ink at full resolution (in place).
+
+    Back-projected edges can be off by up to slack pixels; each edge moves at
+    most that far, to the first/last row and column whose contrast with the
+    surrounding background is at least half the strongest in the box.
+    """
+    img_h, img_w = gray.shape
+    for c in candidates:
+        left, top = max(0, c["left"] - slack), max(0, c["top"] - slack)
+        right = min(img_w, c["left"] + c["width"] + slack)
+        bottom = min(img_h, c["top"] + c["height"] + slack)
+        window = gray[top:bottom, left:right].astype(np.int16)
+        if window.size == 0:
+            continue
+        border = np.concatenate((window[0], window[-1], window[:, 0], window[:, -1]))
+        contrast = np.abs(window - int(np.median(border)))
+        ink = contrast > max(48, contrast.max() // 2)  # Midway to the darkest ink, like Tesseract's own threshold
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if not len(rows) or not len(cols):
+            continue
+        new_left = min(max(left + int(cols[0]), c["left"] - slack), c["left"] + slack)
+        new_top = min(max(top + int(rows[0]), c["top"] - slack), c["top"] + slack)
+        new_right = min(max(left + int(cols[-1]) + 1, c["left"] + c["width"] - slack), c["left"] + c["width"] + slack)
+        new_bottom = min(max(top + int(rows[-1]) + 1, c["top"] + c["height"] - slack), c["top"] + c["height"] + slack)
+        if new_right > new_left and new_bottom > new_top:
+            c["left"], c["top"] = new_left, new_top
+            c["width"], c["height"] = new_right - new_left, new_bottom - new_top
+    return candidates
+
+
+def extract_ocr_candidates(image, engine=None, preprocessor=None, profile=None):
+    """Run Tesseract on a whole image and return word boxes as candidate dicts"""
+    preprocessor = preprocessor or ocr_preprocessor
+    if profile:
+        preprocessor = preprocessor.scaled(profile.scale)
+    processed, scale = preprocessor.apply(image)
+    candidates = candidates_from_ocr_data((engine or ocr_engine).image_to_data(processed, profile))
+    candidates = preprocessor.to_source(candidates, scale)
+    if min(scale) < 1.0:
+        # Read small, but place boxes on full-resolution pixels
+        snap_to_ink(np.asarray(image.convert("L")), candidates, int(np.ceil(1.0 / min(scale))) + 1)
+    return candidates
+
+
+_worker_ocr_engine = None  # Per-process engine inside OcrPool workers
+_worker_ocr_preprocessor = None
+
+
+def _init_ocr_worker(engine_name, preprocess_spec=None):
+    """OcrPool initializer: one Tesseract thread per worker process (the pool provides the parallelism)"""
+    global _worker_ocr_engine, _worker_ocr_preprocessor
+    # Set again before the engine is created: the tesseract program pytesseract starts inherits it.
+    # In-process tesserocr already got it at import (see the top of this module).
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    _worker_ocr_engine = create_ocr_engine(engine_name)
+    _worker_ocr_preprocessor = create_ocr_preprocessor(preprocess_spec)
+
+
+def _ocr_region_task(image, profile=None):
+    return extract_ocr_candidates(image, _worker_ocr_engine, _worker_ocr_preprocessor, profile)
+
+
+class OcrPool:
+    """Process pool that OCRs several screen regions at once.
+
+    Workers are started on first use and live until close(). Each keeps its
+    own OCR engine, limited to one thread so workers don't oversubscribe cores.
+    Workers are always spawned, not forked, so Tesseract is loaded fresh in
+    each one with OMP_THREAD_LIMIT already set.
+    """
+    def __init__(self, workers=None, engine_name=None, preprocess_spec=None):
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.engine_name = engine_name or ocr_engine.name
+        self.preprocess_spec = preprocess_spec or ocr_preprocessor.spec
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Pool only when AI_ASSISTANT_OCR_WORKERS is set above 1"""
+        try:
+            workers = int(os.environ.get('AI_ASSISTANT_OCR_WORKERS', '0'))
+        except ValueError:
+            return None
+        return cls(workers) if workers > 1 else None
+
+    def map(self, images, profile=None):
+        """OCR each image in parallel; returns candidate lists in input order"""
+        with self._lock:
+            executor = self._start()
+        return list(executor.map(_ocr_region_task, images, [profile] * len(images)))
+
+    def imap(self, images, profile=None):
+        """Like map() but yields each result as soon as it (and those before it) are done.
+
+        Closing the iterator early cancels the images not started yet.
+        """
+        with self._lock:
+            executor = self._start()
+        return executor.map(_ocr_region_task, images, [profile] * len(images))
+
+    def _start(self):
+        """The executor, started on first use (call with the lock held)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_ocr_worker,
+                                                 initargs=(self.engine_name, self.preprocess_spec))
+        return self._executor
+
+    def close(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+class TileOcrCache:
+    """Incremental OCR: word boxes are cached per tile, keyed by the tile's pixel content.
+
+    Each tile is OCR'd together with an overlap margin so words crossing a
+    tile border are still read whole; a word is kept only by the tile whose
+    core contains its center. Only tiles whose content changed since they
+    were last seen are sent to Tesseract again, in parallel when a pool is set.
+    Without a pool, an engine that starts a process per call reads the
+    uncached tiles' bounding box once and the words are split into per-tile
+    entries. With band_height, the frame is split into full-width horizontal
+    bands instead of square tiles.
+    """
+    MIN_READ_SCALE = 0.5  # Lowest combined scale an OcrProfile may push a read to
+
+    def __init__(self, tile_size=512, overlap=64, max_entries=512, engine=None, band_height=None, pool=None,
+                 preprocessor=None, text_scale="auto"):
+        self.engine = engine  # None = the shared ocr_engine
+        self.preprocessor = preprocessor  # None = the shared ocr_preprocessor; a pool uses its own
+        self.text_scale = text_scale  # "auto" = shrink HiDPI frames before OCR, or a fixed factor
+        self.device_pixel_ratio = 1.0  # Set by the GUI from the primary screen
+        self._detected_scale = {}  # frame size -> factor from estimate_text_scale()
+        self.measured_scale_disagreements = 0  # Frame sizes where the text height suggested another factor
+        self.pool = pool  # Optional OcrPool for re-reading several tiles at once
+        self.tile_size = tile_size
+        self.band_height = band_height
+        self.overlap = overlap
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.prewarmed = 0  # Tiles OCR'd speculatively while monitoring
+        self.prewarm_hits = 0  # Lookups answered by one of those tiles
+        self._entries = OrderedDict()  # content key -> candidates relative to the tile region
+        self._speculative = set()  # Keys stored by prewarming and not yet looked up
+        self._lock = threading.Lock()
+
+    def regions(self, size):
+        """(core, region) boxes as (left, top, right, bottom) covering an image of size"""
+        width, height = size
+        tile_w = width if self.band_height else self.tile_size
+        tile_h = self.band_height or self.tile_size
+        result = []
+        for top in range(0, height, tile_h):
+            for left in range(0, width, tile_w):
+                core = (left, top, min(width, left + tile_w), min(height, top + tile_h))
+                region = (max(0, core[0] - self.overlap), max(0, core[1] - self.overlap),
+                          min(width, core[2] + self.overlap), min(height, core[3] + self.overlap))
+                result.append((core, region))
+        return result
+
+    @staticmethod
+    def region_key(gray, region):
+        """Content hash of one region of a grayscale array"""
+        left, top, right, bottom = region
+        pixels = np.ascontiguousarray(gray[top:bottom, left:right])
+        return (right - left, bottom - top, hashlib.blake2b(pixels.data, digest_size=16).digest())
+
+    def lookup(self, key):
+        with self._lock:
+            words = self._entries.get(key)
+            if words is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if key in self._speculative:
+                self._speculative.discard(key)
+                self.prewarm_hits += 1
+            return words
+
+    def contains(self, key):
+        """Whether key is cached, without touching the hit/miss counters"""
+        with self._lock:
+            return key in self._entries
+
+    def store(self, key, words, speculative=False):
+        with self._lock:
+            if speculative:
+                if key in self._entries:
+                    return
+                self._speculative.add(key)
+                self.prewarmed += 1
+            self._entries[key] = words
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._speculative.discard(evicted)
+
+    def scale_for(self, gray):
+        """Downscale factor for OCR of a frame (1.0 = full resolution)"""
+        if self.text_scale != "auto":
+            return float(self.text_scale or 1.0)
+        if (self.preprocessor or ocr_preprocessor).scale != 1.0:
+            return 1.0  # An explicit preprocessing scale wins
+        size = (gray.shape[1], gray.shape[0])
+        with self._lock:
+            factor = self._detected_scale.get(size)
+        if factor is None:
+            # Decided once per screen size; flipping between factors would defeat the cache
+            factor = estimate_text_scale(self.device_pixel_ratio)
+            measured = measured_text_scale(gray)
+            with self._lock:
+                self._detected_scale[size] = factor
+                if measured != factor:
+                    self.measured_scale_disagreements += 1
+                disagreements = self.measured_scale_disagreements
+            guided_logger.info(f"OCR text scale for {size[0]}x{size[1]} frames: {factor:.2f} "
+                               f"(device pixel ratio {self.device_pixel_ratio:g}; text height suggests "
+                               f"{measured:.2f}, {disagreements} disagreement(s) so far)")
+        return factor
+
+    def read_profile(self, gray, profile=None):
+        """profile adjusted for the frame's text scale; None means default settings at full resolution"""
+        factor = self.scale_for(gray)
+        if profile and profile.scale < 1.0:
+            # The frame is already read smaller on HiDPI screens; a profile's own downscale
+            # must not compound that below MIN_READ_SCALE (0.5 x 0.5 would give 0.25)
+            base = factor * (self.preprocessor or ocr_preprocessor).scale
+            floor = min(1.0, self.MIN_READ_SCALE / base)
+            if profile.scale < floor:
+                profile = OcrProfile(profile.psm, profile.oem, floor)
+        if factor == 1.0:
+            return profile
+        profile = profile or OcrProfile()
+        return OcrProfile(profile.psm, profile.oem, profile.scale * factor)
+
+    def tile_key(self, gray, region, profile=None):
+        """Cache key of a region read with profile"""
+        key = self.region_key(gray, region)
+        if profile and not profile.is_default:
+            key += (profile.key,)
+        return key
+
+    def prewarm_regions(self, image, gray=None, rects=None):
+        """Uncached (region, key, profile) of image overlapping the changed rects (all regions if rects is None)"""
+        if gray is None:
+            gray = image.convert("L")
+        gray = np.asarray(gray)
+        profile = self.read_profile(gray)
+        result = []
+        for core, region in self.regions(image.size):
+            if rects is not None and not any(_rects_intersect(core, rect) for rect in rects):
+                continue
+            key = self.tile_key(gray, region, profile)
+            if not self.contains(key):
+                result.append((region, key, profile))
+        return result
+
+    def ocr_region(self, image, region, profile=None):
+        """OCR one region; returns candidates relative to the region's top-left"""
+        return extract_ocr_candidates(image.crop(region), self.engine, self.preprocessor, profile)
+
+    def _batches(self, count):
+        """Whether count uncached tiles should be read in one call instead of one call each"""
+        return not self.pool and count > 1 and (self.engine or ocr_engine).process_per_call
+
+    def ocr_batch(self, image, tiles, profile=None):
+        """OCR the bounding box of several (core, region) tiles in one call.
+
+        Returns per-tile candidates relative to each region, holding the words
+        centered in that tile's core, the same entries ocr_region() would cache.
+        """
+        box = (min(t[1][0] for t in tiles), min(t[1][1] for t in tiles),
+               max(t[1][2] for t in tiles), max(t[1][3] for t in tiles))
+        words = extract_ocr_candidates(image.crop(box), self.engine, self.preprocessor, profile)
+        results = [[] for _ in tiles]
+        for word in words:
+            cx = box[0] + word["left"] + word["width"] / 2.0
+            cy = box[1] + word["top"] + word["height"] / 2.0
+            for i, (core, region) in enumerate(tiles):
+                if core[0] <= cx < core[2] and core[1] <= cy < core[3]:
+                    moved = dict(word)
+                    moved["left"] += box[0] - region[0]
+                    moved["top"] += box[1] - region[1]
+                    results[i].append(moved)
+                    break
+        return results
+
+    def ocr(self, image, gray=None):
+        """OCR candidates for the whole image in screen coordinates, renumbered 1..n"""
+        if gray is None:
+            gray = image.convert("L")
+        gray = np.asarray(gray)
+        profile = self.read_profile(gray)
+        tiles = []
+        missing = []
+        for core, region in self.regions(image.size):
+            key = self.tile_key(gray, region, profile)
+            words = self.lookup(key)
+            if words is None:
+                missing.append(len(tiles))
+            tiles.append([core, region, key, words])
+        guided_logger.debug(f"OCR tile cache: {len(tiles) - len(missing)}/{len(tiles)} tiles cached, "
+                           f"{self.hit_rate():.0%} overall hit rate")
+
+        if self.pool and len(missing) > 1:
+            results = self.pool.map([image.crop(tiles[i][1]) for i in missing], profile)
+        elif self._batches(len(missing)):
+            results = self.ocr_batch(image, [tiles[i][:2] for i in missing], profile)
+        else:
+            results = [self.ocr_region(image, tiles[i][1], profile) for i in missing]
+        for i, words in zip(missing, results):
+            tiles[i][3] = words
+            self.store(tiles[i][2], words)
+
+        merged = []
+        for tile_index, (core, region, _, words) in enumerate(tiles):
+            merged.extend(self._keepCore(words, core, region, tile_index))
+        return self.renumber(merged)
+
+    def ocr_tiles(self, image, gray=None, priority_rects=(), profile=None):
+        """Yield (candidates, cached) per tile as soon as it is read; candidates are in
+        screen coordinates, not numbered.
+
+        Cached tiles come first since they cost nothing, then uncached tiles
+        overlapping priority_rects[0], priority_rects[1], ... and finally the
+        rest. Together the tiles give the same words as ocr(). Tiles read with
+        an OcrProfile are cached separately from default reads.
+        """
+        if gray is None:
+            gray = image.convert("L")
+        gray = np.asarray(gray)
+        profile = self.read_profile(gray, profile)
+        cached = []
+        missing = []
+        for tile_index, (core, region) in enumerate(self.regions(image.size)):
+            key = self.tile_key(gray, region, profile)
+            words = self.lookup(key)
+            if words is not None:
+                cached.append((tile_index, core, region, words))
+                continue
+            group = next((i for i, rect in enumerate(priority_rects) if rect and _rects_intersect(core, rect)),
+                         len(priority_rects))
+            missing.append((group, tile_index, core, region, key))
+        missing.sort(key=lambda tile: tile[0])
+
+        for tile_index, core, region, words in cached:
+            yield self._keepCore(words, core, region, tile_index), True
+        if self.pool and len(missing) > 1:
+            results = self.pool.imap([image.crop(tile[3]) for tile in missing], profile)
+        elif self._batches(len(missing)):
+            results = self._batched_by_group(image, missing, profile)
+        else:
+            results = (self.ocr_region(image, tile[3], profile) for tile in missing)
+        try:
+            for (_, tile_index, core, region, key), words in zip(missing, results):
+                self.store(key, words)
+                yield self._keepCore(words, core, region, tile_index), False
+        finally:
+            close = getattr(results, "close", None)
+            if close:
+                close()
+
+    def _batched_by_group(self, image, missing, profile):
+        """Per-tile results for ocr_tiles(), one call per priority group so early exit still pays off"""
+        start = 0
+        while start < len(missing):
+            end = start
+            while end < len(missing) and missing[end][0] == missing[start][0]:
+                end += 1
+            group = missing[start:end]
+            if len(group) > 1:
+                yield from self.ocr_batch(image, [(tile[2], tile[3]) for tile in group], profile)
+            else:
+                yield self.ocr_region(image, group[0][3], profile)
+            start = end
+
+    @staticmethod
+    def _keepCore(words, core, region, tile_index=0):
+        """Shift region-relative words to screen coordinates, keeping those centered in the core"""
+        kept = []
+        for word in words:
+            left = word["left"] + region[0]
+            top = word["top"] + region[1]
+            cx = left + word["width"] / 2.0
+            cy = top + word["height"] / 2.0
+            if core[0] <= cx < core[2] and core[1] <= cy < core[3]:
+                moved = dict(word)
+                moved["left"] = left
+                moved["top"] = top
+                if "line_key" in word:
+                    moved["line_key"] = (tile_index,) + tuple(word["line_key"])
+                kept.append(moved)
+        return kept
+
+    @staticmethod
+    def renumber(candidates):
+        """Sort top to bottom, left to right and assign fresh ocr_ids"""
+        candidates.sort(key=lambda c: (c["top"], c["left"]))
+        for i, candidate in enumerate(candidates, start=1):
+            candidate["ocr_id"] = i
+        return candidates
+
+    def stats(self):
+        """(hits, misses, cached tiles)"""
+        with self._lock:
+            return self.hits, self.misses, len(self._entries)
+
+    def hit_rate(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def prewarm_stats(self):
+        """(tiles prewarmed, lookups they answered)"""
+        with self._lock:
+            return self.prewarmed, self.prewarm_hits
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+
+
+ocr_cache = TileOcrCache(pool=OcrPool.from_env())
+
+
+class StreamingLocator:
+    """Early-exit OCR for one target: tiles are read in priority order and
+    reading stops as soon as the target shows up as a confident exact match.
+
+    Exact means the word (or phrase) has the same terms as the target; fuzzy
+    and partial matches never stop the scan, so when there is no exact match
+    the result is the same as a full OCR of the frame.
+    """
+    MIN_CONFIDENCE = 0.8
+
+    def __init__(self, target, priority_rects=(), cache=None, profiles=None, app=None, profile=None):
+        self.target = target
+        self.terms = [t for t in _TERM_SPLIT.split(target.lower()) if t]
+        self.priority_rects = [rect for rect in priority_rects if rect]
+        self.cache = cache  # None = the shared ocr_cache
+        self.profiles = profiles  # Optional OcrProfileStore to pick and learn Tesseract settings
+        self.app = app  # Foreground app identity, part of the page fingerprint
+        self.profile = profile  # OcrProfile used for this locate; None = profiles.choose()
+        self.matches = []
+        self.first_match_ms = None  # Time to the confident match, if there was one
+        self.ocr_ms = 0.0  # Time spent reading tiles (the full OCR time when nothing matched)
+        self.total_ms = 0.0  # End to end, including building the returned CandidateSet
+        self.uncached_ms = 0.0  # Time spent on tiles that were not in the cache
+        self.uncached_tiles = 0
+        self.tiles_read = 0
+        self.tiles_total = 0
+
+    @property
+    def stopped_early(self):
+        return self.tiles_read < self.tiles_total
+
+    def confident_matches(self, candidate_set):
+        """Candidates (or merged phrase boxes) whose terms equal the target's"""
+        if not self.terms:
+            return []
+        if len(self.terms) >= 2:
+            found = candidate_set.phrases(self.terms)
+        else:
+            found = candidate_set.views(candidate_set.term_index.positions(self.terms))
+        return [c for c in found if c["confidence"] >= self.MIN_CONFIDENCE
+                and [t for t in _TERM_SPLIT.split(str(c["text"]).lower()) if t] == self.terms]
+
+    def run(self, frame, interrupted=None):
+        """OCR a Frame until the target is found; returns the CandidateSet read so far.
+
+        interrupted() is checked between tiles; when it returns True the read
+        is abandoned and None returned, with nothing recorded.
+        """
+        cache = self.cache or ocr_cache
+        frame = Frame.wrap(frame)
+        self.tiles_total = len(cache.regions(frame.size))
+        if self.profiles and self.profile is None:
+            self.profile = self.profiles.choose(self.app, frame)
+        words = []
+        candidate_set = None
+        seen = set()  # Target terms read so far
+        started = waiting = time.perf_counter()
+        tiles = cache.ocr_tiles(frame.image, frame.gray(), self.priority_rects, self.profile)
+        try:
+            for tile_words, cached in tiles:
+                if not cached:
+                    self.uncached_ms += (time.perf_counter() - waiting) * 1000.0
+                    self.uncached_tiles += 1
+                self.tiles_read += 1
+                words.extend(tile_words)
+                candidate_set = self._match(tile_words, words, seen)
+                if candidate_set is not None:
+                    self.first_match_ms = (time.perf_counter() - started) * 1000.0
+                    candidate_set.partial = self.stopped_early
+                    break
+                if interrupted and interrupted():
+                    return None
+                waiting = time.perf_counter()
+        finally:
+            tiles.close()
+        self.ocr_ms = (time.perf_counter() - started) * 1000.0
+        if candidate_set is None:
+            candidate_set = CandidateSet(TileOcrCache.renumber(words))
+        self.total_ms = (time.perf_counter() - started) * 1000.0
+        if self.profiles:
+            # Only uncached reads are timed: prewarmed default tiles would make the default look fastest
+            self.profiles.record(self.app, frame, self.profile, self.uncached_ms, self.first_match_ms is not None,
+                                 self.uncached_tiles, self.target)
+        guided_logger.info(self.summary())
+        return candidate_set
+
+    def _match(self, tile_words, words, seen):
+        """CandidateSet of words if the new tile completes a confident match, else None.
+
+        Only a tile that adds a target term can complete one, so the set is
+        built just then rather than after every tile.
+        """
+        found = {t for w in tile_words for t in _TERM_SPLIT.split(w["text"].lower()) if t in self.terms}
+        if not found:
+            return None
+        seen |= found
+        if len(seen) < len(set(self.terms)):
+            return None
+        candidate_set = CandidateSet(TileOcrCache.renumber(words))
+        self.matches = self.confident_matches(candidate_set)
+        return candidate_set if self.matches else None
+
+    def summary(self):
+        using = f" with {self.profile}" if self.profile else ""
+        if self.first_match_ms is None:
+            return (f"Locate '{self.target}'{using}: no confident match, full OCR {self.ocr_ms:.0f} ms, "
+                    f"{self.total_ms:.0f} ms end to end ({self.tiles_total} tiles)")
+        return (f"Locate '{self.target}'{using}: first match after {self.first_match_ms:.0f} ms, "
+                f"{self.tiles_read}/{self.tiles_total} tiles read"
+                + (" (stopped early)" if self.stopped_early else ""))
+
+
+class OcrProfileStore:
+    """Learned Tesseract settings per page, persisted as JSON between sessions.
+
+    A page is identified by the foreground app plus a perceptual hash of the
+    frame; frames within max_distance bits of a known page reuse its entry.
+    Locates use the page's profile that matched most often, fastest (the
+    default until others are known). The other CANDIDATES are tried once each
+    off the locate path: OcrPrewarmWorker re-locates the last target found on
+    the page with them while the screen is idle. Speed is the mean OCR time
+    per uncached tile, since cached tiles cost every profile nothing.
+    """
+    CANDIDATES = (OcrProfile(), OcrProfile(psm=11), OcrProfile(psm=6), OcrProfile(scale=0.5))
+    HASH_SIZE = 8
+
+    def __init__(self, path=None, max_distance=6, max_pages=200):
+        self.path = path or os.environ.get('AI_ASSISTANT_OCR_PROFILES', 'ocr_profiles.json')
+        self.max_distance = max_distance
+        self.max_pages = max_pages
+        # [{"app", "phash", "target", "stats": {profile key: [profile, runs, matches, total_ms, tiles]}}],
+        # newest last; total_ms is the OCR time of the tiles that were not cached, target the last one found
+        self._pages = []
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def _page(self, app, phash, create=False):
+        best = None
+        for page in self._pages:
+            if page["app"] != app:
+                continue
+            distance = hamming_distance(page["phash"], phash)
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, page)
+        if best:
+            return best[1]
+        if not create:
+            return None
+        page = {"app": app, "phash": phash, "target": None, "stats": {}}
+        self._pages.append(page)
+        del self._pages[:-self.max_pages]
+        return page
+
+    @staticmethod
+    def _score(entry):
+        _, runs, matches, total_ms, tiles = entry
+        return (matches / float(runs), -total_ms / tiles if tiles else float("-inf"))
+
+    def choose(self, app, frame):
+        """Profile to locate on this page with: the best so far, else the default"""
+        return self.best(app, frame) or self.CANDIDATES[0]
+
+    def explore(self, app, frame):
+        """(untried candidate, target to locate with it) for this page, or None.
+
+        Only pages where a locate found its target qualify, so a candidate is
+        judged on text known to be on the screen.
+        """
+        with self._lock:
+            page = self._page(app, frame.phash(self.HASH_SIZE))
+            if page is None or not page["target"]:
+                return None
+            for profile in self.CANDIDATES:
+                if profile.key not in page["stats"]:
+                    return profile, page["target"]
+            return None
+
+    def best(self, app, frame):
+        """Best known profile for this page, or None if it has none yet"""
+        with self._lock:
+            page = self._page(app, frame.phash(self.HASH_SIZE))
+            if not page or not page["stats"]:
+                return None
+            return max(page["stats"].values(), key=self._score)[0]
+
+    def record(self, app, frame, profile, elapsed_ms, matched, tiles=1, target=None):
+        """Remember whether profile found target on this page and the OCR time of its uncached tiles"""
+        profile = profile or self.CANDIDATES[0]
+        with self._lock:
+            page = self._page(app, frame.phash(self.HASH_SIZE), create=True)
+            if matched and target:
+                page["target"] = target
+            entry = page["stats"].setdefault(profile.key, [profile, 0, 0, 0.0, 0])
+            entry[1] += 1
+            entry[2] += 1 if matched else 0
+            if tiles:
+                entry[3] += elapsed_ms
+                entry[4] += tiles
+            self._pages.remove(page)
+            self._pages.append(page)  # Most recently used last, so trimming drops stale pages
+            self._dirty = True
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Could not read OCR profiles from {self.path}: {e}")
+            return
+        timed = data.get("version", 1) >= 2  # Version 1 timed whole locates, cached tiles included
+        pages = []
+        for item in data.get("pages", []):
+            try:
+                stats = {}
+                for row in item["stats"]:
+                    profile = OcrProfile.from_dict(row["profile"])
+                    stats[profile.key] = [profile, int(row["runs"]), int(row["matches"]),
+                                          float(row["total_ms"]) if timed else 0.0, int(row["tiles"]) if timed else 0]
+                pages.append({"app": item.get("app"), "phash": int(item["phash"], 16),
+                              "target": item.get("target"), "stats": stats})
+            except (KeyError, TypeError, ValueError):
+                continue
+        with self._lock:
+            self._pages = pages[-self.max_pages:]
+
+    def save(self):
+        """Write the table if anything was learned since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": 2, "pages": [
+                {"app": page["app"], "phash": f"{page['phash']:x}", "target": page["target"],
+                 "stats": [{"profile": profile.to_dict(), "runs": runs, "matches": matches,
+                            "total_ms": round(total_ms, 1), "tiles": tiles}
+                           for profile, runs, matches, total_ms, tiles in page["stats"].values()]}
+                for page in self._pages]}
+            self._dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save OCR profiles to {self.path}: {e}")
+
+
+# ==================== IMAGE UPLOADS ====================
+
+class ImageEncoder:
+    """Encode PIL images in memory for Gemini uploads (no temp files)"""
+    MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+    def __init__(self, fmt="JPEG", quality=85, compress_level=6):
+        fmt = fmt.upper()
+        if fmt not in self.MIME_TYPES:
+            raise ValueError(f"Unsupported upload format: {fmt}")
+        self.fmt = fmt
+        self.quality = quality  # JPEG/WEBP quality (1-100)
+        self.compress_level = compress_level  # PNG zlib level (0-9) / WEBP method (0-6)
+
+    def encode(self, image):
+        """Return (bytes, mime_type) for a PIL image"""
+        buffer = io.BytesIO()
+        if self.fmt == "JPEG":
+            image.convert("RGB").save(buffer, "JPEG", quality=self.quality)
+        elif self.fmt == "WEBP":
+            image.save(buffer, "WEBP", quality=self.quality, method=min(6, self.compress_level))
+        else:
+            image.save(buffer, "PNG", compress_level=self.compress_level)
+        return buffer.getvalue(), self.MIME_TYPES[self.fmt]
+
+    def payload(self, image, transform=None):
+        """Return (bytes, mime_type) of the upload for an image.
+
+        Frames reuse their cached payload bytes; PIL images go through transform first.
+        """
+        if isinstance(image, Frame):
+            return image.encoded(self, transform or VisionTransform(image.size))
+        if transform:
+            image = transform.apply(image)
+        return self.encode(image)
+
+    @staticmethod
+    def part(data, mime_type, spool=None):
+        """Gemini content part for encoded bytes, optionally spooling a copy to disk"""
+        if spool:
+            spool.write(data, mime_type)
+        return genai.types.Part.from_bytes(data=data, mime_type=mime_type)
+
+    def to_part(self, image, spool=None, transform=None):
+        """Encode an image into a Gemini content part, optionally spooling a copy to disk"""
+        data, mime_type = self.payload(image, transform)
+        return self.part(data, mime_type, spool)
+
+
+class ScreenshotSpool:
+    """Bounded on-disk copy of uploaded images for debugging; oldest files are evicted"""
+    EXTENSIONS = {"image/jpeg": ".jpg", "image/webp": ".webp", "image/png": ".png"}
+
+    def __init__(self, directory, max_files=20, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Spool only when AI_ASSISTANT_SPOOL_DIR is set"""
+        directory = os.environ.get('AI_ASSISTANT_SPOOL_DIR')
+        if not directory:
+            return None
+        try:
+            return cls(directory)
+        except OSError as e:
+            print(f"Screenshot spool disabled: {e}")
+            return None
+
+    def write(self, data, mime_type):
+        """Write one upload and evict old ones; returns the file path"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(self.directory, f"screenshot_{timestamp}{self.EXTENSIONS.get(mime_type, '.bin')}")
+        with self._lock:
+            try:
+                with open(path, 'wb') as f:
+                    f.write(data)
+                self._evict()
+            except OSError as e:
+                print(f"Screenshot spool write failed: {e}")
+        return path
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith("screenshot_"):
+                full = os.path.join(self.directory, name)
+                stat = os.stat(full)
+                entries.append((stat.st_mtime, stat.st_size, full))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_files or total > self.max_bytes):
+            _, size, full = entries.pop(0)
+            os.remove(full)
+            total -= size
+
+
+class VisionTransform:
+    """Maps between source screenshot pixels and the (cropped, scaled) image sent to the model"""
+    def __init__(self, source_size, crop_box=None, payload_size=None):
+        self.source_size = source_size  # (width, height) of the full screenshot
+        self.crop_box = crop_box or (0, 0, source_size[0], source_size[1])  # (left, top, right, bottom)
+        crop_w = self.crop_box[2] - self.crop_box[0]
+        crop_h = self.crop_box[3] - self.crop_box[1]
+        self.payload_size = payload_size or (crop_w, crop_h)
+        # Payload pixels -> source pixels
+        self.scale_x = crop_w / float(self.payload_size[0])
+        self.scale_y = crop_h / float(self.payload_size[1])
+
+    def is_identity(self):
+        return self.crop_box == (0, 0, self.source_size[0], self.source_size[1]) and \
+            self.payload_size == self.source_size
+
+    def apply(self, image):
+        """Crop and resize a source image into the payload image"""
+        if self.is_identity():
+            return image
+        if self.crop_box != (0, 0, image.width, image.height):
+            image = image.crop(self.crop_box)
+        if image.size != tuple(self.payload_size):
+            image = image.resize(self.payload_size, Image.Resampling.BICUBIC, reducing_gap=2.0)
+        return image
+
+    def to_source(self, x, y, width, height):
+        """Map a payload-space box to source pixels, rounding outwards so it still covers the element"""
+        left = self.crop_box[0] + x * self.scale_x
+        top = self.crop_box[1] + y * self.scale_y
+        right = self.crop_box[0] + (x + width) * self.scale_x
+        bottom = self.crop_box[1] + (y + height) * self.scale_y
+        left_i, top_i = int(left), int(top)
+        right_i, bottom_i = -int(-right // 1), -int(-bottom // 1)
+        return left_i, top_i, right_i - left_i, bottom_i - top_i
+
+
+class VisionPayloadPolicy:
+    """Pick the upload resolution per request type (longest edge in pixels)"""
+    MAX_EDGE = {
+        "identify_page": 768,    # "What page is this?" needs layout, not detail
+        "analysis": 1280,        # Background screen summaries
+        "selection": 1280,       # Picking an OCR id from a list
+        "chat": 1600,            # Free-form questions about the screen
+        "coordinates": 2048,     # Pixel coordinates of a UI element
+    }
+
+    def plan(self, image_size, kind, crop_box=None):
+        """Build the transform for an image of image_size sent as request type kind"""
+        crop_box = crop_box or (0, 0, image_size[0], image_size[1])
+        crop_w = crop_box[2] - crop_box[0]
+        crop_h = crop_box[3] - crop_box[1]
+        max_edge = self.MAX_EDGE.get(kind, self.MAX_EDGE["chat"])
+        scale = min(1.0, max_edge / float(max(crop_w, crop_h)))
+        payload_size = (max(1, round(crop_w * scale)), max(1, round(crop_h * scale)))
+        return VisionTransform(image_size, crop_box, payload_size)
+
+
+# Shared upload settings used by all workers
+upload_encoder = ImageEncoder()
+payload_policy = VisionPayloadPolicy()
+upload_spool = ScreenshotSpool.from_env()
+
+
+# ==================== GEMINI CLIENTS ====================
+
+class GenaiClientPool:
+    """Process-wide genai clients, one per API key, created on first use.
+
+    A client keeps its HTTP connection pool (keep-alive connections and TLS
+    sessions), so reusing it skips connection setup on every request. The
+    underlying httpx client is thread-safe, so workers share one client.
+    """
+    def __init__(self, http_options=None):
+        self.http_options = http_options  # e.g. {"base_url": ...} for a local test server
+        self._clients = {}  # api key -> genai.Client
+        self._lock = threading.Lock()
+
+    def get(self, api_key):
+        api_key = api_key.strip()
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                if self.http_options:
+                    client = genai.Client(api_key=api_key, http_options=self.http_options)
+                else:
+                    client = genai.Client(api_key=api_key)
+                self._clients[api_key] = client
+            return client
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+
+genai_clients = GenaiClientPool()
+
+
+class ResponseCache:
+    """Gemini replies to repeated prompts, in an in-memory LRU backed by SQLite.
+
+    Entries are keyed by a hash of the model and the whitespace-normalized
+    prompt (plus the image payload, for callers that opt in) and expire after
+    ttl seconds. The database connection is shared by worker threads, so all
+    access goes through one lock.
+    """
+    def __init__(self, path, ttl=24 * 3600, max_entries=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries  # In memory; the database keeps everything until it expires
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (created, response)
+        self._lock = threading.Lock()
+        self._db = None  # Opened on first use
+
+    def _database(self):
+        """The SQLite connection (call with the lock held); expired rows are dropped when it opens"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            with self._db:
+                self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                                 "(key TEXT PRIMARY KEY, model TEXT, created REAL, response TEXT)")
+                self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        return self._db
+
+    @classmethod
+    def from_env(cls):
+        """Cache in AI_ASSISTANT_RESPONSE_CACHE (default response_cache.sqlite3); "off" disables it"""
+        path = os.environ.get('AI_ASSISTANT_RESPONSE_CACHE', 'response_cache.sqlite3')
+        if not path or path.lower() == "off":
+            return None
+        try:
+            ttl = float(os.environ.get('AI_ASSISTANT_RESPONSE_CACHE_TTL', 24)) * 3600
+        except ValueError:
+            ttl = 24 * 3600
+        return cls(path, ttl)
+
+    @staticmethod
+    def key(model, prompt, image_digest=None):
+        normalized = " ".join(prompt.split())
+        digest = hashlib.sha256(f"{model}\0{normalized}".encode("utf-8"))
+        if image_digest:
+            digest.update(b"\0" + image_digest)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Cached response for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            try:
+                if entry is None:
+                    row = self._database().execute("SELECT created, response FROM responses WHERE key = ?",
+                                                   (key,)).fetchone()
+                    if row:
+                        entry = (row[0], row[1])
+                        self._remember(key, entry)
+                if entry is not None and now - entry[0] > self.ttl:
+                    self._entries.pop(key, None)
+                    entry = None
+                    with self._database() as db:
+                        db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                print(f"Response cache read failed: {e}")
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, model, response):
+        entry = (time.time(), response)
+        with self._lock:
+            self._remember(key, entry)
+            try:
+                with self._database() as db:
+                    db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                               (key, model, entry[0], response))
+            except sqlite3.Error as e:
+                print(f"Response cache write failed: {e}")
+
+    def evict(self, key):
+        """Forget the response for key (e.g. a reply that turned out to be wrong)"""
+        with self._lock:
+            self._entries.pop(key, None)
+            try:
+                with self._database() as db:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                print(f"Response cache write failed: {e}")
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """(hits, misses, entries in memory)"""
+        with self._lock:
+            return self.hits, self.misses, len(self._entries)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+response_cache = ResponseCache.from_env()
+
+
 class GeminiWorker(QThread):
     """Worker thread for making async Gemini API calls"""
     response_received = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
     retry_attempt = pyqtSignal(int, float)  # Emits attempt number and wait time
+    MODEL = "gemini-2.0-flash"
     
-    def __init__(self, message, api_key, image_path=None, image_data=None, system_prompt=None):
+    def __init__(self, message, api_key, image_path=None, image_data=None, system_prompt=None,
+                 payload_kind="chat", payload_transform=None, cache_response=False, cache_with_image=False):
         super().__init__()
+        # Reuse an earlier reply to the same prompt (response_cache); requests with an
+        # image are only cached when cache_with_image is also set
+        self.cache_response = cache_response
+        self.cache_with_image = cache_with_image
+        self.cache_key = None  # Set once the request is keyed, so a caller can evict a bad reply
         self.message = message
         self.api_key = api_key
         self.image_path = image_path  # Optional image file path
-        self.image_data = image_data  # Optional PIL Image object (direct buffer)
+        self.image_data = image_data  # Optional Frame or PIL Image object (direct buffer)
         self.system_prompt = system_prompt # Optional system prompt override
+        self.payload_kind = payload_kind  # Request type used to pick the upload resolution
+        self.payload_transform = payload_transform  # Precomputed transform (coordinate requests)
     
     def _is_service_unavailable(self, exception):
         """Check if exception is a 503 Service Unavailable error"""
@@ -483,8 +2888,8 @@ class GeminiWorker(QThread):
         sys.stdout.flush()
         sys.stderr.flush()
         
-        # Initialize client with API key
-        client = genai.Client(api_key=self.api_key.strip())
+        # Shared client for this API key (keeps its connections alive between calls)
+        client = genai_clients.get(self.api_key)
         
         # Prepare contents
         contents = []
@@ -501,12 +2906,33 @@ class GeminiWorker(QThread):
         contents.append(final_message)
         
         # Add image from path
+        image = None
         if self.image_path and os.path.exists(self.image_path):
             image = Image.open(self.image_path)
-            contents.append(image)
         # Add image from buffer (PIL object)
         elif self.image_data:
-            contents.append(self.image_data)
+            image = self.image_data
+        payload = None
+        if image is not None:
+            # Downscale and encode in memory on this worker thread
+            transform = self.payload_transform or payload_policy.plan(image.size, self.payload_kind)
+            payload = upload_encoder.payload(image, transform)
+        
+        # Check the cache before spooling or uploading anything
+        cache_key = None
+        if response_cache and self.cache_response and (image is None or self.cache_with_image):
+            image_digest = hashlib.sha256(payload[0]).digest() if payload else None
+            cache_key = ResponseCache.key(self.MODEL, final_message, image_digest)
+            self.cache_key = cache_key
+            cached = response_cache.get(cache_key)
+            hits, misses, _ = response_cache.stats()
+            if cached is not None:
+                print(f"[ResponseCache] hit ({hits} hits, {misses} misses)")
+                return cached
+            print(f"[ResponseCache] miss ({hits} hits, {misses} misses)")
+        
+        if payload:
+            contents.append(upload_encoder.part(*payload, spool=upload_spool))
         
         # Make API call with retry decorator
         @retry(
@@ -516,7 +2942,7 @@ class GeminiWorker(QThread):
         )
         def _call_api():
             response = client.models.generate_content(
-                model="gemini-2.0-flash",
+                model=self.MODEL,
                 contents=contents
             )
             return response
@@ -525,6 +2951,8 @@ class GeminiWorker(QThread):
         
         # Extract response text
         response_text = response.text if hasattr(response, 'text') else str(response)
+        if cache_key and response_text:
+            response_cache.put(cache_key, self.MODEL, response_text)
         return response_text
     
     def run(self):
@@ -570,12 +2998,13 @@ class AnalysisWorker(QThread):
             sys.stdout.flush()
             sys.stderr.flush()
             
-            client = genai.Client(api_key=self.api_key.strip())
+            client = genai_clients.get(self.api_key)
+            transform = payload_policy.plan(self.image.size, "analysis")
             prompt = "Analyze this screen. What application is this? What is the user trying to do? List key UI elements (buttons, menus, input fields) with their approximate screen positions."
             
             response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=[prompt, self.image]
+                model=GeminiWorker.MODEL,
+                contents=[prompt, upload_encoder.to_part(self.image, upload_spool, transform)]
             )
             self.finished.emit(response.text)
         except Exception as e:
@@ -583,6 +3012,202 @@ class AnalysisWorker(QThread):
             self.finished.emit(f"Analysis failed: {str(e)}")
 
 
+class OcrWorker(QThread):
+    """Long-lived thread that runs OCR jobs off the GUI thread.
+
+    Only the newest request matters: a new request replaces a queued one, and
+    the result of a job that was superseded while running is dropped.
+    """
+    result_ready = pyqtSignal(int, object)  # job id, candidate list
+    error_occurred = pyqtSignal(int, str)  # job id, error message
+
+    def __init__(self):
+        super().__init__()
+        self._condition = threading.Condition()
+        self._pending = None  # (job_id, frame) waiting to run
+        self._generation = 0  # id of the newest request
+        self._running = False
+        self._stopping = False
+
+    def busy(self):
+        """Whether a job is queued or running"""
+        with self._condition:
+            return self._running or self._pending is not None
+
+    def request(self, image, locator=None):
+        """Queue OCR of a Frame (or PIL image); returns the job id reported with the result.
+
+        With a StreamingLocator, OCR stops once its target is found and the
+        result holds only the words read up to then.
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, Frame.wrap(image), locator)
+            self._condition.notify()
+            return self._generation
+
+    def cancel(self):
+        """Drop the queued job and ignore the result of the running one"""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+
+    def _isCurrent(self, job_id):
+        with self._condition:
+            return job_id == self._generation
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                job_id, frame, locator = self._pending
+                self._pending = None
+                self._running = True
+            try:
+                if locator and locator.terms:
+                    candidates = locator.run(frame)
+                else:
+                    candidates = frame.ocr_candidates()
+            except Exception as e:
+                if self._isCurrent(job_id):
+                    self.error_occurred.emit(job_id, str(e))
+                continue
+            finally:
+                with self._condition:
+                    self._running = False
+            if self._isCurrent(job_id):
+                self.result_ready.emit(job_id, candidates)
+
+    def stop(self):
+        """Stop the thread after the running job (if any) finishes"""
+        with self._condition:
+            self._stopping = True
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+
+
+class OcrPrewarmWorker(QThread):
+    """Idle-priority thread that OCRs changed tiles of monitoring frames ahead of time.
+
+    Results only go into the tile cache, so a later OCR request for the same
+    screen finds most tiles already read. Only tiles overlapping the changed
+    areas are read. Work is done one tile at a time and throttled to a share
+    of one core (cpu_budget); it pauses while is_busy() reports a real OCR job
+    and skips ahead when a newer frame arrives, carrying the changed areas it
+    had not finished over to that frame.
+
+    With an OcrProfileStore, a frame that is fully prewarmed and not yet
+    replaced also gets its page's untried OCR profiles explored, under the
+    same budget, so locates never pay for trying them.
+    """
+    def __init__(self, cache, cpu_budget=0.25, is_busy=None, profiles=None):
+        super().__init__()
+        self.cache = cache
+        self.cpu_budget = max(0.01, min(1.0, cpu_budget))
+        self.is_busy = is_busy or (lambda: False)
+        self.profiles = profiles
+        self._condition = threading.Condition()
+        self._pending = None  # (frame, changed rects) waiting to be prewarmed
+        self._stopping = False
+
+    def submit(self, frame, rects=None):
+        """Prewarm frame next, replacing any frame not started yet.
+
+        rects are the changed areas (left, top, right, bottom); None means the whole frame.
+        """
+        with self._condition:
+            if self._pending is not None:
+                rects = self._mergeRects(self._pending[1], rects)  # Skipped frames' changes still need reading
+            self._pending = (frame, rects)
+            self._condition.notify()
+
+    @staticmethod
+    def _mergeRects(a, b):
+        if a is None or b is None:
+            return None
+        return list(a) + list(b)
+
+    def _wait(self, seconds):
+        """Sleep up to seconds; returns False if stopping or a newer frame arrived"""
+        with self._condition:
+            if seconds > 0 and not self._stopping and self._pending is None:
+                self._condition.wait(seconds)
+            return not self._stopping and self._pending is None
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                frame, rects = self._pending
+                self._pending = None
+            try:
+                if self._prewarm(frame, rects):
+                    if self.profiles:
+                        self._explore(frame)
+                else:
+                    with self._condition:
+                        if self._pending is not None:
+                            newer, newer_rects = self._pending
+                            self._pending = (newer, self._mergeRects(rects, newer_rects))
+            except Exception as e:
+                # Prewarming is optional; a broken OCR setup will be reported by the real request
+                guided_logger.warning(f"Speculative OCR disabled: {e}")
+                return
+
+    def _idle(self):
+        """Wait out any real OCR job; returns False if stopping or a newer frame arrived"""
+        while self.is_busy():
+            if not self._wait(0.1):
+                return False
+        return self._wait(0)
+
+    def _prewarm(self, frame, rects):
+        """Read the frame's uncached changed tiles; returns False if interrupted"""
+        image = frame.image
+        for region, key, profile in self.cache.prewarm_regions(image, frame.gray(), rects):
+            if not self._idle():
+                return False
+            if self.cache.contains(key):
+                continue
+            started = time.perf_counter()
+            self.cache.store(key, self.cache.ocr_region(image, region, profile), speculative=True)
+            spent = time.perf_counter() - started
+            # Duty cycle: idle long enough that OCR stays within cpu_budget of one core
+            if not self._wait(spent * (1.0 - self.cpu_budget) / self.cpu_budget):
+                return False
+        return True
+
+    def _explore(self, frame):
+        """Locate the page's last target with each untried profile until a newer frame arrives"""
+        app = foreground_app_name()
+        while True:
+            choice = self.profiles.explore(app, frame)
+            if choice is None:
+                return
+            profile, target = choice
+            started = time.perf_counter()
+            locator = StreamingLocator(target, cache=self.cache, profiles=self.profiles, app=app, profile=profile)
+            if locator.run(frame, interrupted=lambda: not self._idle()) is None:
+                return
+            spent = time.perf_counter() - started
+            if not self._wait(spent * (1.0 - self.cpu_budget) / self.cpu_budget):
+                return
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+
+
 class OverlayShape:
     """Data class for shapes drawn on the overlay"""
     def __init__(self, shape_type, x, y, width, height, color="red", label=None, step=1):
@@ -688,6 +3313,29 @@ class OverlayWindow(QWidget):
         self.all_shapes = []
         self.update()
 
+    def paintedRects(self):
+        """Regions (overlay coordinates) that current shapes can paint, incl. pulse, pen and label"""
+        rects = []
+        font = self.font()
+        font.setBold(True)
+        font.setPointSize(12)
+        fm = QFontMetrics(font)
+        for shape in self.shapes:
+            rect = QRect(shape.rect)
+            # Pulse grows shapes by up to 5%, plus the 3px pen
+            grow_x = int(rect.width() * 0.03) + 4
+            grow_y = int(rect.height() * 0.03) + 4
+            rect.adjust(-grow_x, -grow_y, grow_x, grow_y)
+            if shape.type == "ARROW":
+                rect = rect.united(QRect(shape.rect.center(), QSize(30, 30)))
+            if shape.label:
+                label_rect = fm.boundingRect(shape.label)
+                label_rect.adjust(-10, -5, 10, 5)
+                label_rect.moveCenter(QPoint(rect.center().x(), rect.top() - 25))
+                rect = rect.united(label_rect.adjusted(-2, -2, 2, 2))
+            rects.append(rect)
+        return rects
+
     def _clampRect(self, rect):
         """Clamp rectangle to overlay bounds"""
         bounds = self.rect()
@@ -853,7 +3501,8 @@ class FollowAlongManager:
     def __init__(self, parent):
         self.parent = parent
         self.active = False
-        self.last_screen_hash = None
+        self.screen_differ = TileDiffEngine()
+        self.last_screen_diff = None
         self.same_screen_count = 0
         self.tts_engine = None
         
@@ -864,7 +3513,29 @@ class FollowAlongManager:
         self.total_steps = 0  # Estimated total steps
         self.pending_action = None  # Description of action user needs to take
         self.waiting_for_completion = False  # True when showing overlay, waiting for user action
-        self.step_start_hash = None  # Screen hash when step overlay was shown
+        self.step_start_frame = None  # First monitoring frame captured with the step overlay masked
+        self.step_start_phash = None  # Perceptual hash of that frame
+        self.step_start_tiles = None  # Tile hashes of that frame (small changes the phash misses)
+        self.step_target_rects = None  # Highlighted element(s) as (left, top, right, bottom) frame pixels
+        self.step_target_tiles = None  # Boolean tile mask around the highlighted target(s)
+        self._start_after_seq = 0  # Monitoring frames up to this seq predate the overlay
+        
+        # Step completion tuning (see guided_task.log for observed distances)
+        self.phash_size = 8  # 8 -> 64-bit dHash, 16 -> 256-bit
+        self.step_change_threshold = 10  # Min Hamming distance from step start to count as changed
+        # A toggle, list selection or dialog field barely moves the whole-screen phash, so a step
+        # also counts as changed when 64 px tiles differ from the step start: any tile near the
+        # highlighted target, or step_change_tiles elsewhere (a clock tick or blinking caret can
+        # touch two tiles when it straddles a tile edge).
+        self.step_change_tiles = 3
+        self.target_margin = 128  # Pixels around the target whose tiles count as "near"
+        self.settle_threshold = 4  # Max distance between consecutive frames to count as stable
+        self.settle_tiles = 1  # Max tiles changed between consecutive frames to count as stable (caret blink)
+        self.settle_frames = 2  # Consecutive stable, changed frames required before advancing
+        self._last_frame = None
+        self._last_phash = None
+        self._last_tiles = None
+        self._settle_count = 0
         
         # Initialize TTS
         try:
@@ -880,7 +3551,8 @@ class FollowAlongManager:
 
     def start(self):
         self.active = True
-        self.last_screen_hash = None
+        self.screen_differ.reset()
+        self.last_screen_diff = None
         self.speak("Follow-along mode activated.")
 
     def stop(self):
@@ -907,13 +3579,37 @@ class FollowAlongManager:
         self.total_steps = 0
         self.pending_action = None
         self.waiting_for_completion = False
-        self.step_start_hash = None
+        self.step_start_frame = None
+        self.step_start_phash = None
+        self.step_start_tiles = None
+        self.step_target_rects = None
+        self.step_target_tiles = None
+        self._start_after_seq = 0
+        self._last_frame = None
+        self._last_phash = None
+        self._last_tiles = None
+        self._settle_count = 0
     
-    def setStepShown(self, action_description, screen_hash=None):
-        """Called when a step overlay is displayed"""
+    def setStepShown(self, action_description, target_rects=None, after_seq=0):
+        """Called when a step overlay is displayed.
+
+        target_rects are the highlighted elements as (left, top, right, bottom)
+        monitoring-frame pixels. The step's starting screen is the first
+        monitoring frame after after_seq that is masked the way later frames
+        will be (see _setStartFrame), so the overlay itself never counts as a change.
+        """
         self.pending_action = action_description
         self.waiting_for_completion = True
-        self.step_start_hash = screen_hash
+        self.step_start_frame = None
+        self.step_start_phash = None
+        self.step_start_tiles = None
+        self.step_target_rects = list(target_rects or ())
+        self.step_target_tiles = None
+        self._start_after_seq = after_seq
+        self._last_frame = None
+        self._last_phash = None
+        self._last_tiles = None
+        self._settle_count = 0
         if action_description:
             self.speak(action_description)
         print(f"[GuidedNav] Step {self.current_step} shown: {action_description}")
@@ -944,42 +3640,120 @@ class FollowAlongManager:
             except Exception as e:
                 print(f"TTS Error: {e}")
     
-    def checkScreenChange(self, current_image):
-        """Check if screen changed significantly"""
+    def checkScreenChange(self, current_image, screen_diff=None):
+        """Check if screen changed significantly.
+
+        Pass the diff already computed for this frame to avoid hashing it twice.
+        """
         if not self.active or not current_image:
             return False
             
         try:
-            # Convert to grayscale and resize for fast comparison
-            # Using hash or raw bytes
-            from PIL import ImageOps
-            
-            # Simple hash check
-            # Resize to small thumbnail to ignore minor noise
-            thumb = current_image.resize((64, 64), Image.Resampling.LANCZOS)
-            gray = ImageOps.grayscale(thumb)
-            current_hash = hash(gray.tobytes())
-            
-            is_changed = False
-            if self.last_screen_hash is not None:
-                # If hash differs (basic check, can be improved with ImageChops)
-                if current_hash != self.last_screen_hash:
-                    is_changed = True
-            
-            self.last_screen_hash = current_hash
+            if screen_diff is None:
+                screen_diff = self.screen_differ.diff(current_image)
+            # The first frame after start() has nothing to compare against
+            is_changed = self.last_screen_diff is not None and screen_diff.significant
+            self.last_screen_diff = screen_diff
             return is_changed
         except Exception as e:
             print(f"Diff check failed: {e}")
             return False
     
-    def checkStepCompletion(self, current_hash):
-        """Check if user completed the current step (screen changed after action)"""
-        if not self.waiting_for_completion:
+    def _setStartFrame(self, frame):
+        """Use frame as the step's starting screen"""
+        self.step_start_frame = frame
+        self.step_start_phash = frame.phash(self.phash_size)
+        self.step_start_tiles = frame.tile_hashes(self.screen_differ.tile_size)
+        self.step_target_tiles = None
+        if self.step_target_rects:
+            self.step_target_tiles = self._tileMask(self.step_start_tiles.shape, self.step_target_rects,
+                                                    self.target_margin)
+        self._last_frame = frame
+        self._last_phash = self.step_start_phash
+        self._last_tiles = self.step_start_tiles
+        guided_logger.debug(f"Step {self.current_step} start frame: seq {frame.seq}")
+
+    def _tileMask(self, shape, rects, margin=0):
+        """Tiles of a tile-hash grid touched by rects (grown by margin pixels)"""
+        tile = self.screen_differ.tile_size
+        mask = np.zeros(shape, dtype=bool)
+        for left, top, right, bottom in rects:
+            mask[max(0, (top - margin) // tile):max(0, (bottom + margin - 1) // tile + 1),
+                 max(0, (left - margin) // tile):max(0, (right + margin - 1) // tile + 1)] = True
+        return mask
+
+    def _unmaskedTiles(self, shape, *frames):
+        """Tiles not covered by our own windows in any of frames; masked tiles are filled, not seen"""
+        rects = [rect for frame in frames for rect in frame.masked_rects]
+        return ~self._tileMask(shape, rects) if rects else None
+
+    @staticmethod
+    def _changedTiles(a, b, mask=None):
+        """Number of differing tiles between two tile-hash grids, optionally within mask (None if not comparable)"""
+        if a is None or b is None or a.shape != b.shape:
+            return None
+        differs = a != b
+        if mask is not None:
+            differs &= mask
+        return int(np.count_nonzero(differs))
+
+    def checkStepCompletion(self, frame):
+        """Check if user completed the current step (screen changed and settled after action)"""
+        if not self.waiting_for_completion or frame is None:
             return False
+        if self.step_start_frame is None:
+            # Frames from before the overlay, or whose mask will change next frame, would
+            # differ from later frames of the same screen
+            if frame.seq > self._start_after_seq and frame.mask_stable:
+                self._setStartFrame(frame)
+            return False
+        
+        current_phash = frame.phash(self.phash_size)
+        current_tiles = frame.tile_hashes(self.screen_differ.tile_size)
+        distance = hamming_distance(current_phash, self.step_start_phash)
+        visible = None
+        if current_tiles.shape == self.step_start_tiles.shape:
+            visible = self._unmaskedTiles(current_tiles.shape, frame, self.step_start_frame)
+        changed_tiles = self._changedTiles(current_tiles, self.step_start_tiles, visible)
+        target_tiles = None
+        if self.step_target_tiles is not None:
+            near = self.step_target_tiles if visible is None else self.step_target_tiles & visible
+            target_tiles = self._changedTiles(current_tiles, self.step_start_tiles, near)
+        jitter = hamming_distance(current_phash, self._last_phash)
+        jitter_visible = None
+        if current_tiles.shape == self._last_tiles.shape:
+            jitter_visible = self._unmaskedTiles(current_tiles.shape, frame, self._last_frame)
+        jitter_tiles = self._changedTiles(current_tiles, self._last_tiles, jitter_visible)
+        self._last_frame = frame
+        self._last_phash = current_phash
+        self._last_tiles = current_tiles
+        
+        changed = (distance >= self.step_change_threshold
+                   or (changed_tiles is not None and changed_tiles >= self.step_change_tiles)
+                   or bool(target_tiles))
+        settled = jitter <= self.settle_threshold and (jitter_tiles is None or jitter_tiles <= self.settle_tiles)
+        if not changed:
+            # Back at (or still on) the step's starting screen
+            self._settle_count = 0
+        elif settled:
+            self._settle_count += 1
+        else:
+            # Changed but still moving (animation, page load)
+            self._settle_count = 0
+        
+        width = self.phash_size * self.phash_size // 4
+        guided_logger.debug(
+            f"Step {self.current_step} phash={current_phash:0{width}x} start={self.step_start_phash:0{width}x} "
+            f"distance={distance} changed_tiles={changed_tiles} target_tiles={target_tiles} "
+            f"jitter={jitter} jitter_tiles={jitter_tiles} "
+            f"settle={self._settle_count}/{self.settle_frames}"
+        )
         
-        # If screen hash is different from when we showed the step, user likely took action
-        if self.step_start_hash is not None and current_hash != self.step_start_hash:
-            print(f"[GuidedNav] Screen changed after step {self.current_step}")
+        if self._settle_count >= self.settle_frames:
+            print(f"[GuidedNav] Screen changed after step {self.current_step} "
+                  f"(distance={distance}, changed tiles={changed_tiles})")
+            guided_logger.info(f"Step {self.current_step} completed: distance={distance}, "
+                               f"changed_tiles={changed_tiles}, target_tiles={target_tiles}")
             return True
         return False
 
@@ -988,7 +3762,7 @@ class ContextPanel(QWidget):
     """Panel to display real-time AI context analysis"""
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setFixedHeight(140)
+        self.setFixedHeight(156)
         self.setStyleSheet("""
             QWidget {
                 background: rgba(0, 0, 0, 0.3);
@@ -1063,6 +3837,11 @@ class ContextPanel(QWidget):
         self.app_label.setStyleSheet("color: white; font-weight: 600; font-size: 13px; border: none; background: transparent;")
         layout.addWidget(self.app_label)
         
+        # Capture cadence (adaptive monitoring interval and counts)
+        self.capture_label = QLabel("Capture: idle")
+        self.capture_label.setStyleSheet("color: rgba(255,255,255,0.5); font-size: 10px; border: none; background: transparent;")
+        layout.addWidget(self.capture_label)
+        
         # Details (scrollable info)
         self.details_label = QLabel("Screen monitoring active. Analyzing content...")
         self.details_label.setWordWrap(True)
@@ -1088,6 +3867,12 @@ class ContextPanel(QWidget):
         elif status == "IDLE":
             self.app_label.setStyleSheet("color: white; font-weight: 600; font-size: 13px; border: none; background: transparent;")
     
+    def updateCaptureStats(self, interval_ms, capture_count, changed_count):
+        """Show the current monitoring interval and capture counts"""
+        self.capture_label.setText(
+            f"Capture: every {interval_ms} ms • {capture_count} frames • {changed_count} changed"
+        )
+    
     def updateContext(self, analysis_text):
         """Update the panel with new analysis data"""
         lines = analysis_text.strip().split('\n')
@@ -1204,20 +3989,43 @@ class CircularWindow(QWidget):
         # API worker thread
         self.gemini_worker = None
         
+        # OCR thread; only the latest request's result is delivered
+        self.ocr_worker = OcrWorker()
+        self.ocr_worker.result_ready.connect(self._onOcrResult)
+        self.ocr_worker.error_occurred.connect(self._onOcrError)
+        self.ocr_worker.start()
+        self._ocr_callback = None  # (job_id, callback) waiting for an OCR result
+        self.ocr_profiles = OcrProfileStore()  # Learned Tesseract settings per page (ocr_profiles.json)
+        ocr_cache.device_pixel_ratio = QGuiApplication.primaryScreen().devicePixelRatio()
+        
         # API key stored in memory (session only)
         self.api_key = None
         
         # Screen monitoring state
         self.screen_monitoring_enabled = False
-        self.latest_screenshot = None
+        self.frame_ring = FrameRing(capacity=4)  # Recent monitoring frames (newest = latest_screenshot)
+        self.capture_worker = None  # Background capture thread while monitoring is on
+        self.speculative_ocr_enabled = True  # OCR changed tiles in the background while monitoring
+        self.prewarm_worker = None
+        self._last_processed_seq = 0
         self.last_capture_time = None
+        self.last_screen_diff = None  # Changed tiles + bounding region of the latest capture
         self.is_analyzing = False  # Flag to prevent overlapping analysis calls
         self.last_overlay_query = None
         self.last_overlay_retry = 0
         self.last_overlay_image = None
+        self.last_overlay_transform = None  # Payload <-> screenshot mapping of the last coordinate request
+        self.pending_shape_transform = None  # Same, for SHAPE[...] replies in guided navigation
+        # LLM coordinate fallback: try cropped regions before the full screen
+        self.overlay_crop_state = None  # {"message", "image", "level", "box", "remaining"}
+        self.roi_crop_stats = {}  # level -> {"attempts": n, "hits": n}
+        self.last_target_rect = None  # (left, top, width, height) of the last highlighted target, screenshot px
         self.last_ocr_candidates = None
         self.pending_candidate_selection = None
         self.debug_overlay_candidates = False  # Set True to see all matching OCR boxes
+        # Capture without hiding our windows; mask their known geometry instead
+        self.capture_exclusion_mode = True
+        self.window_masker = WindowMasker(fill_max_age=10.0)  # Shared with the monitoring capture thread
         
         
         # Follow-Along Manager
@@ -1235,6 +4043,7 @@ class CircularWindow(QWidget):
         self.conv_current_page = None  # Step 2 result: current page identity
         self.conv_target_word = None   # Step 3 result: exact word to locate
         self.conv_screenshot = None    # Screenshot captured for steps 2-4
+        self.conv_cache_keys = []      # Response cache keys of this cycle's cached replies (steps 1 and 3)
         
         # Hotkey Manager
         self.hotkey_manager = GlobalHotkeyManager(self)
@@ -1247,9 +4056,14 @@ class CircularWindow(QWidget):
         # Delay start to avoid constructor issues
         QTimer.singleShot(1000, self.hotkey_manager.start)
         
-        # Screen monitor timer (3 second interval)
-        self.screen_monitor_timer = QTimer(self)
-        self.screen_monitor_timer.timeout.connect(self._autoCapture)
+        # Stop the capture thread cleanly on exit
+        QApplication.instance().aboutToQuit.connect(self._stopScreenCapture)
+        QApplication.instance().aboutToQuit.connect(self.ocr_worker.stop)
+        QApplication.instance().aboutToQuit.connect(ocr_cache.close)
+        QApplication.instance().aboutToQuit.connect(self.ocr_profiles.save)
+        QApplication.instance().aboutToQuit.connect(genai_clients.close)
+        if response_cache:
+            QApplication.instance().aboutToQuit.connect(response_cache.close)
         
         # Robot face animation state
         self._pulse_value = 0.0  # For glow pulse animation
@@ -1848,6 +4662,10 @@ User message: {{user_message}}"""
             else:
                 clean_text_lines.append(line)
         
+        # Shapes from a guided step request are in downscaled payload pixels
+        transform = self.pending_shape_transform
+        self.pending_shape_transform = None
+        
         # Load parsing results into overlay
         if parsed_shapes:
             # COORDINATE VALIDATION
@@ -1856,6 +4674,11 @@ User message: {{user_message}}"""
             
             valid_shapes = []
             for s in parsed_shapes:
+                if transform:
+                    # Payload -> screenshot pixels -> screen (DPI-aware)
+                    x, y, w, h = transform.to_source(s.rect.x(), s.rect.y(), s.rect.width(), s.rect.height())
+                    src_w, src_h = transform.source_size
+                    s.rect = QRect(int(x * sw / src_w), int(y * sh / src_h), int(w * sw / src_w), int(h * sh / src_h))
                 # Clamp coordinates to screen bounds to prevent off-screen drawing
                 rect = s.rect
                 nx = max(0, min(rect.x(), sw - 10))
@@ -1870,8 +4693,20 @@ User message: {{user_message}}"""
             
             # If in guided mode, set step as shown and wait for completion
             if self.follow_manager.guided_mode:
-                current_hash = getattr(self, 'last_screen_hash_val', None)
-                self.follow_manager.setStepShown(action_description, current_hash)
+                # The capture thread supplies the step's starting frame (the next one masked
+                # with the overlay), so nothing is grabbed or hashed on the GUI thread
+                self._updateCaptureMask()
+                latest = self.frame_ring.latest()
+                target_rects = None
+                if latest:
+                    # Shapes are in screen coordinates; the tile grid is in screenshot pixels
+                    fx = latest.width / float(sw)
+                    fy = latest.height / float(sh)
+                    target_rects = [(int(r.x() * fx), int(r.y() * fy), int((r.x() + r.width()) * fx),
+                                     int((r.y() + r.height()) * fy)) for r in (v.rect for v in valid_shapes)]
+                self.follow_manager.setStepShown(action_description, target_rects,
+                                                 after_seq=latest.seq if latest else 0)
+            self._boostScreenCapture()
         
         clean_text = '\n'.join(clean_text_lines)
         
@@ -1929,7 +4764,16 @@ User message: {{user_message}}"""
                 # Maybe AI returned raw list of overlays?
                 overlays = data
             
+            crop_state = self.overlay_crop_state
             if not overlays or not isinstance(overlays, list):
+                if crop_state:
+                    self._recordCropResult(crop_state["level"], hit=False)
+                    if crop_state["remaining"]:
+                        # Not in this region - widen to the next crop level
+                        print(f"[DEBUG] No match in '{crop_state['level']}' region, widening")
+                        self._requestOverlayForMessage(crop_state["message"], image_override=crop_state["image"],
+                                                       crop_levels=crop_state["remaining"])
+                        return
                 # No overlays found
                 msg = """
                 <div style="background: rgba(255, 200, 100, 0.2); 
@@ -1948,19 +4792,23 @@ User message: {{user_message}}"""
             # Validate and create shapes
             screen_geom = QGuiApplication.primaryScreen().virtualGeometry()
             sw, sh = screen_geom.width(), screen_geom.height()
+            # Payload coordinates map back to screenshot pixels through the upload transform
+            transform = self.last_overlay_transform
             # Scale coordinates from screenshot space to screen space (handles DPI scaling)
             sx = 1.0
             sy = 1.0
             source_image = self.last_overlay_image or self.latest_screenshot
-            if source_image:
+            source_size = transform.source_size if transform else None
+            if source_size is None and source_image:
                 try:
-                    img_w, img_h = source_image.size
-                    if img_w > 0 and img_h > 0:
-                        sx = sw / float(img_w)
-                        sy = sh / float(img_h)
+                    source_size = source_image.size
                 except Exception:
-                    sx = 1.0
-                    sy = 1.0
+                    source_size = None
+            if source_size:
+                img_w, img_h = source_size
+                if img_w > 0 and img_h > 0:
+                    sx = sw / float(img_w)
+                    sy = sh / float(img_h)
             
             shapes = []
             for overlay in overlays:
@@ -1979,7 +4827,9 @@ User message: {{user_message}}"""
                     elif shape_type in ["CIRCLE", "ELLIPSE"]:
                         shape_type = "CIRCLE"
                     
-                    # Scale to screen coordinates (DPI-aware)
+                    # Undo payload downscaling, then scale to screen coordinates (DPI-aware)
+                    if transform:
+                        x, y, w, h = transform.to_source(x, y, w, h)
                     x = int(x * sx)
                     y = int(y * sy)
                     w = int(w * sx)
@@ -2006,10 +4856,18 @@ User message: {{user_message}}"""
                     print(f"Error parsing overlay: {e}")
                     continue
             
+            if crop_state:
+                self._recordCropResult(crop_state["level"], hit=bool(shapes))
+            
             if shapes:
                 self.overlay.loadShapes(shapes)
                 # Leave edit mode off after new overlays
                 self.overlay.setEditMode(False)
+                self._boostScreenCapture()
+                if source_size:
+                    first = shapes[0].rect
+                    self.last_target_rect = (int(first.x() / sx), int(first.y() / sy),
+                                             int(first.width() / sx), int(first.height() / sy))
                 
                 # Success message
                 msg = f"""
@@ -2052,7 +4910,13 @@ User message: {{user_message}}"""
                     """
                     self.message_area.append(retry_msg)
                     self.scrollToBottom()
-                    self._requestOverlayForMessage(self.last_overlay_query, padding_note="Increase the box by 15% in width and height to fully cover the element.")
+                    # Retry on the same image and region that produced the tiny box
+                    retry_image, retry_levels = None, None
+                    if crop_state:
+                        retry_image = crop_state["image"]
+                        retry_levels = [(crop_state["level"], crop_state["box"])] + crop_state["remaining"]
+                    self._requestOverlayForMessage(self.last_overlay_query, padding_note="Increase the box by 15% in width and height to fully cover the element.",
+                                                   image_override=retry_image, crop_levels=retry_levels)
                     return
                 warn_msg = """
                 <div style="background: rgba(255, 180, 80, 0.2); 
@@ -2194,28 +5058,20 @@ User message: {{user_message}}"""
         }
 
     def _tokenize(self, text):
-        import re
-        return [t for t in re.split(r"[\W_]+", text.lower()) if t]
-
-    def _levenshtein(self, a, b):
-        if a == b:
-            return 0
-        if len(a) == 0:
-            return len(b)
-        if len(b) == 0:
-            return len(a)
-        prev = list(range(len(b) + 1))
-        for i, ca in enumerate(a, 1):
-            cur = [i]
-            for j, cb in enumerate(b, 1):
-                cost = 0 if ca == cb else 1
-                cur.append(min(
-                    prev[j] + 1,
-                    cur[j - 1] + 1,
-                    prev[j - 1] + cost
-                ))
-            prev = cur
-        return prev[-1]
+        return [t for t in _TOKEN_SPLIT.split(text.lower()) if t]
+
+    def _queryMatchMasks(self, candidate_set, query_tokens):
+        """(exact, fuzzy) boolean masks: a query token equals a word token, or is within edit distance 2"""
+        index = candidate_set.token_index
+        exact = np.zeros(len(candidate_set), dtype=bool)
+        exact[index.positions(query_tokens)] = True
+        near = set()
+        for qt in set(query_tokens):
+            near.update(index.near(qt, 2))
+        fuzzy = np.zeros(len(candidate_set), dtype=bool)
+        fuzzy[index.positions(near)] = True
+        fuzzy &= ~exact & candidate_set.confident_mask(0.6)
+        return exact, fuzzy
 
     def _validateOcrSelection(self, selected_id, candidates, query):
         if not selected_id or not candidates:
@@ -2224,53 +5080,27 @@ User message: {{user_message}}"""
         if not query_tokens:
             return None
 
-        exact = []
-        fuzzy = []
-        for c in candidates:
-            text_tokens = self._tokenize(c.get("text", ""))
-            if any(qt in text_tokens for qt in query_tokens):
-                exact.append(c)
-                continue
-            if c.get("confidence", 0) >= 0.6:
-                for qt in query_tokens:
-                    if any(self._levenshtein(qt, tt) <= 2 for tt in text_tokens):
-                        fuzzy.append(c)
-                        break
-
-        def smallest_area(items):
-            return min(items, key=lambda x: x.get("width", 0) * x.get("height", 0), default=None)
-
-        if exact:
-            best = smallest_area(exact)
-        elif fuzzy:
-            best = smallest_area(fuzzy)
-        else:
+        candidate_set = CandidateSet.coerce(candidates)
+        exact, fuzzy = self._queryMatchMasks(candidate_set, query_tokens)
+        mask = exact if exact.any() else fuzzy
+        if not mask.any():
             return None
 
-        if best and best.get("ocr_id") == selected_id:
+        best = candidate_set.smallest(mask, limit=1)[0]
+        if best["ocr_id"] == selected_id:
             return selected_id
         return None
 
     def _topCandidateList(self, candidates, query, limit=5):
         # Prefer exact matches, then fuzzy, else highest confidence
+        candidate_set = CandidateSet.coerce(candidates)
         query_tokens = self._tokenize(query or "")
-        exact = []
-        fuzzy = []
-        for c in candidates:
-            text_tokens = self._tokenize(c.get("text", ""))
-            if any(qt in text_tokens for qt in query_tokens):
-                exact.append(c)
-                continue
-            if c.get("confidence", 0) >= 0.6:
-                for qt in query_tokens:
-                    if any(self._levenshtein(qt, tt) <= 2 for tt in text_tokens):
-                        fuzzy.append(c)
-                        break
-        if exact:
-            return sorted(exact, key=lambda x: x.get("width", 0) * x.get("height", 0))[:limit]
-        if fuzzy:
-            return sorted(fuzzy, key=lambda x: x.get("width", 0) * x.get("height", 0))[:limit]
-        return sorted(candidates, key=lambda x: x.get("confidence", 0), reverse=True)[:limit]
+        exact, fuzzy = self._queryMatchMasks(candidate_set, query_tokens)
+        if exact.any():
+            return candidate_set.smallest(exact, limit)
+        if fuzzy.any():
+            return candidate_set.smallest(fuzzy, limit)
+        return candidate_set.most_confident(limit)
     
     def onRetryAttempt(self, attempt_number, wait_time):
         """Handle retry attempt - show user feedback"""
@@ -2297,6 +5127,7 @@ User message: {{user_message}}"""
     
     def onAIError(self, error_message):
         """Handle API error"""
+        self.pending_shape_transform = None
         # Remove loading indicator
         cursor = self.message_area.textCursor()
         cursor.movePosition(cursor.End)
@@ -2330,20 +5161,85 @@ User message: {{user_message}}"""
         scrollbar = self.message_area.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
-    def _requestOverlayForMessage(self, message, padding_note=None, image_override=None):
-        """Send overlay-only request with strict JSON output"""
+    def _overlayCropLevels(self, image):
+        """Candidate regions for the LLM fallback, smallest first, ending with the full screen"""
+        img_w, img_h = image.size
+        levels = []
+
+        def add(level, box):
+            if not box:
+                return
+            left, top = max(0, int(box[0])), max(0, int(box[1]))
+            right, bottom = min(img_w, int(box[2])), min(img_h, int(box[3]))
+            if right - left < 64 or bottom - top < 64:
+                return
+            # Not worth a separate round trip if it is (nearly) the whole screen
+            if (right - left) * (bottom - top) > 0.7 * img_w * img_h:
+                return
+            if any(existing == (left, top, right, bottom) for _, existing in levels):
+                return
+            levels.append((level, (left, top, right, bottom)))
+
+        if self.last_target_rect:
+            x, y, w, h = self.last_target_rect
+            margin = 300
+            add("previous_target", (x - margin, y - margin, x + w + margin, y + h + margin))
+        diff = self.last_screen_diff
+        if diff and diff.bbox and diff.frame_size == image.size:
+            x, y, w, h = diff.bbox
+            add("changed", (x - 32, y - 32, x + w + 32, y + h + 32))
+        add("foreground", foreground_window_rect())
+
+        levels.sort(key=lambda item: (item[1][2] - item[1][0]) * (item[1][3] - item[1][1]))
+        levels.append(("full", None))
+        return levels
+
+    def _recordCropResult(self, level, hit):
+        """Track and log how often each crop level locates the element"""
+        stats = self.roi_crop_stats.setdefault(level, {"attempts": 0, "hits": 0})
+        stats["attempts"] += 1
+        if hit:
+            stats["hits"] += 1
+        rates = ", ".join(f"{name}={s['hits']}/{s['attempts']}" for name, s in self.roi_crop_stats.items())
+        guided_logger.info(f"ROI crop '{level}' {'hit' if hit else 'miss'} (hit rates: {rates})")
+
+    def _requestOverlayForMessage(self, message, padding_note=None, image_override=None, crop_levels=None):
+        """Send overlay-only request with strict JSON output.
+
+        With crop_levels, only the first region is sent; onOverlayJSONResponse
+        widens to the next level if the model reports no match.
+        """
         screen_geom = QGuiApplication.primaryScreen().virtualGeometry()
         pad_rule = ""
         if padding_note:
             pad_rule = f"\n- {padding_note}"
 
         image = image_override or self.latest_screenshot
+        level, crop_box = ("full", None)
+        if image and crop_levels:
+            level, crop_box = crop_levels[0]
+            self.overlay_crop_state = {
+                "message": message,
+                "image": image,
+                "level": level,
+                "box": crop_box,
+                "remaining": crop_levels[1:],
+            }
+        else:
+            self.overlay_crop_state = None
+        if crop_box:
+            pad_rule += '\n- This is a cropped region of the screen. If the element is not visible in it, return {"overlays": []}.'
+
         img_w, img_h = (0, 0)
+        transform = None
         if image:
             try:
-                img_w, img_h = image.size
+                # The model sees a (cropped) downscaled copy; ask for coordinates in that space
+                transform = payload_policy.plan(image.size, "coordinates", crop_box=crop_box)
+                img_w, img_h = transform.payload_size
             except Exception:
                 img_w, img_h = (0, 0)
+        self.last_overlay_transform = transform
 
         system_prompt = f"""Find the exact UI element in this screenshot: "{message}"
 
@@ -2361,9 +5257,10 @@ Screenshot size is {img_w}x{img_h} pixels.
 Screen is {screen_geom.width()}x{screen_geom.height()} pixels.
 x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
 
-        print(f"[DEBUG] Overlay command: {message}")
+        print(f"[DEBUG] Overlay command: {message} (region: {level})")
 
-        self.gemini_worker = GeminiWorker(message, self.api_key, image_data=image, system_prompt=system_prompt)
+        self.gemini_worker = GeminiWorker(message, self.api_key, image_data=image, system_prompt=system_prompt,
+                                          payload_transform=transform)
         self.gemini_worker.response_received.connect(self.onOverlayJSONResponse)
         self.gemini_worker.error_occurred.connect(self.onAIError)
         self.gemini_worker.retry_attempt.connect(self.onRetryAttempt)
@@ -2373,7 +5270,11 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
     def _handleOcrOverlayRequest(self, message, image):
         """Hybrid overlay: try OCR-first, fall back to LLM coordinates if no match"""
         print(f"[DEBUG] _handleOcrOverlayRequest: message='{message}'")
-        candidates = self._extractOcrCandidates(image)
+        self._requestOcr(image, lambda candidates: self._onOverlayOcrReady(message, image, candidates))
+
+    def _onOverlayOcrReady(self, message, image, candidates):
+        """Continue an overlay request once OCR of the screenshot is done"""
+        # A full read (no locate): selection ids from this set must refer to the whole screen
         self.last_ocr_candidates = candidates
         print(f"[DEBUG] OCR found {len(candidates)} total candidates")
 
@@ -2424,9 +5325,9 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
         self.message_area.append(fallback_msg)
         self.scrollToBottom()
         
-        # Use the existing LLM coordinate method
+        # Use the existing LLM coordinate method, starting from the smallest likely region
         print(f"[DEBUG] Calling _requestOverlayForMessage")
-        self._requestOverlayForMessage(message, image_override=image)
+        self._requestOverlayForMessage(message, image_override=image, crop_levels=self._overlayCropLevels(image))
     
     def _localOcrMatch(self, query, candidates):
         """Find OCR candidates matching the query locally (no LLM)"""
@@ -2456,35 +5357,28 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
             print("[DEBUG] No target tokens found after filtering")
             return []
         
-        exact_matches = []
-        fuzzy_matches = []
-        
-        for c in candidates:
-            text_lower = c["text"].lower().strip()
-            
-            # Exact full-text match (strongest)
-            if text_lower in query_tokens:
-                exact_matches.append(c)
-                continue
-            
-            # Token-in-text match
-            text_tokens = set(re.split(r'[\s\W]+', text_lower))
-            matching_tokens = query_tokens & text_tokens
-            if matching_tokens:
-                exact_matches.append(c)
-                continue
-            
-            # Fuzzy match (Levenshtein distance <= 2) only for longer tokens
-            if c["confidence"] >= 0.6:
-                for qt in query_tokens:
-                    if len(qt) >= 4:  # Only fuzzy match longer tokens
-                        for tt in text_tokens:
-                            if len(tt) >= 4 and self._levenshtein(qt, tt) <= 2:
-                                fuzzy_matches.append(c)
-                                break
-                        else:
-                            continue
-                        break
+        candidate_set = CandidateSet.coerce(candidates)
+        
+        # Several target words in a row: prefer the whole phrase
+        ordered_tokens = [t for t in _TERM_SPLIT.split(query.lower()) if t in query_tokens]
+        if len(ordered_tokens) >= 2:
+            phrases = candidate_set.phrases(ordered_tokens)
+            if phrases:
+                print(f"[DEBUG] Phrase matches: {len(phrases)}")
+                return phrases
+        
+        # Exact full-text match (strongest) or token-in-text match, via the inverted indexes
+        exact = set(candidate_set.text_index.positions(query_tokens))
+        exact.update(candidate_set.term_index.positions(query_tokens))
+        exact_matches = candidate_set.views(sorted(exact))
+        
+        # Fuzzy match (Levenshtein distance <= 2) only for longer tokens
+        near = set()
+        for qt in query_tokens:
+            if len(qt) >= 4:  # Only fuzzy match longer tokens
+                near.update(tt for tt in candidate_set.term_index.near(qt, 2) if len(tt) >= 4)
+        fuzzy_matches = [c for c in candidate_set.views(candidate_set.term_index.positions(near))
+                         if c.index not in exact and c["confidence"] >= 0.6]
         
         print(f"[DEBUG] Exact matches: {len(exact_matches)}, Fuzzy matches: {len(fuzzy_matches)}")
         
@@ -2493,24 +5387,6 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
             return exact_matches
         return fuzzy_matches
     
-    def _levenshtein(self, s1, s2):
-        """Simple Levenshtein distance"""
-        if len(s1) < len(s2):
-            return self._levenshtein(s2, s1)
-        if len(s2) == 0:
-            return len(s1)
-        
-        prev_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            curr_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = prev_row[j + 1] + 1
-                deletions = curr_row[j] + 1
-                substitutions = prev_row[j] + (c1 != c2)
-                curr_row.append(min(insertions, deletions, substitutions))
-            prev_row = curr_row
-        return prev_row[-1]
-    
     def _renderFilteredCandidates(self, candidates, source_image):
         """Render only filtered/matching OCR candidates for debug"""
         shapes = []
@@ -2519,53 +5395,59 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
             shapes.append(OverlayShape("RECT", c["left"], c["top"], c["width"], c["height"], "lime", label, step=1))
         self._renderOverlayShapes(shapes, source_image)
 
-    def _extractOcrCandidates(self, image):
-        """Run OCR and build candidate list"""
-        try:
-            import pytesseract
-        except Exception:
-            self.message_area.append("""
-            <div style="background: rgba(255, 100, 100, 0.2); 
-                        border: 1px solid rgba(255, 150, 150, 0.4); 
-                        border-radius: 16px; 
-                        padding: 12px 16px; 
-                        margin: 8px 0; 
-                        color: rgba(255, 200, 200, 0.95);">
-                <b>OCR Error:</b> pytesseract not available.
-            </div>
-            """)
-            self.scrollToBottom()
-            return []
+    def _requestOcr(self, image, callback, locate=None):
+        """OCR a Frame (or PIL image) on the OCR thread and call callback(candidates) on the GUI thread.
 
-        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-        candidates = []
-        ocr_id = 1
-        n = len(data.get("text", []))
-        for i in range(n):
-            text = data["text"][i].strip()
-            if not text:
-                continue
-            conf_raw = data.get("conf", [0])[i]
-            try:
-                conf_val = float(conf_raw)
-            except Exception:
-                conf_val = -1.0
-            conf = max(0.0, min(1.0, conf_val / 100.0)) if conf_val >= 0 else 0.0
-            left = int(data["left"][i])
-            top = int(data["top"][i])
-            width = int(data["width"][i])
-            height = int(data["height"][i])
-            candidates.append({
-                "ocr_id": ocr_id,
-                "text": text,
-                "left": left,
-                "top": top,
-                "width": width,
-                "height": height,
-                "confidence": conf
-            })
-            ocr_id += 1
-        return candidates
+        With locate (a target string), OCR reads the likeliest regions first
+        and stops at the first confident exact match of the target.
+        A newer request supersedes this one; its callback is then never called,
+        and input stays disabled until the newer request finishes.
+        """
+        locator = None
+        if locate:
+            locator = StreamingLocator(locate, self._locatePriorityRects(), profiles=self.ocr_profiles,
+                                       app=foreground_app_name())
+        job_id = self.ocr_worker.request(image, locator)
+        self._ocr_callback = (job_id, callback)
+        return job_id
+
+    def _locatePriorityRects(self):
+        """Regions to OCR first when locating a target: the foreground window, then around the last target"""
+        rects = [foreground_window_rect()]
+        if self.last_target_rect:
+            x, y, w, h = self.last_target_rect
+            margin = 300
+            rects.append((x - margin, y - margin, x + w + margin, y + h + margin))
+        return rects
+
+    def _cancelOcr(self):
+        """Forget any pending OCR request"""
+        self.ocr_worker.cancel()
+        self._ocr_callback = None
+
+    def _onOcrResult(self, job_id, candidates):
+        if not self._ocr_callback or self._ocr_callback[0] != job_id:
+            return  # Superseded
+        _, callback = self._ocr_callback
+        self._ocr_callback = None
+        callback(candidates)
+
+    def _onOcrError(self, job_id, error):
+        if not self._ocr_callback or self._ocr_callback[0] != job_id:
+            return
+        print(f"OCR failed: {error}")
+        self.message_area.append(f"""
+        <div style="background: rgba(255, 100, 100, 0.2); 
+                    border: 1px solid rgba(255, 150, 150, 0.4); 
+                    border-radius: 16px; 
+                    padding: 12px 16px; 
+                    margin: 8px 0; 
+                    color: rgba(255, 200, 200, 0.95);">
+            <b>OCR Error:</b> {error}
+        </div>
+        """)
+        self.scrollToBottom()
+        self._onOcrResult(job_id, [])
 
     def _requestOcrSelection(self, message, candidates, image):
         """Ask LLM to select an OCR candidate by id"""
@@ -2584,10 +5466,11 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
             "- selection must be null if confidence < 0.6\n"
             "- If ambiguous, return selection null and include up to 5 candidates.\n"
             "- Only use ocr_id from candidates.\n\n"
-            f"Candidates:\n{json.dumps(candidates)}"
+            f"Candidates:\n{json.dumps(CandidateSet.coerce(candidates).to_dicts())}"
         )
 
-        self.gemini_worker = GeminiWorker(message, self.api_key, image_data=image, system_prompt=prompt)
+        self.gemini_worker = GeminiWorker(message, self.api_key, image_data=image, system_prompt=prompt,
+                                          payload_kind="selection")
         self.gemini_worker.response_received.connect(self.onOcrSelectionResponse)
         self.gemini_worker.error_occurred.connect(self.onAIError)
         self.gemini_worker.retry_attempt.connect(self.onRetryAttempt)
@@ -2636,6 +5519,7 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
         print(f"[DEBUG] Loading {len(scaled)} shapes into overlay")
         self.overlay.loadShapes(scaled)
         self.overlay.setEditMode(False)
+        self._boostScreenCapture()
 
     def _drawOverlayFromCandidate(self, candidate, padding, source_image):
         """Draw overlay from OCR candidate"""
@@ -2647,6 +5531,7 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
         height = candidate["height"] + (pad * 2)
         print(f"[DEBUG] Drawing rect at ({left}, {top}) size ({width}x{height})")
         shape = OverlayShape("RECT", left, top, width, height, "red", "target", step=1)
+        self.last_target_rect = (candidate["left"], candidate["top"], candidate["width"], candidate["height"])
         self._renderOverlayShapes([shape], source_image)
 
     # ==================== GUIDED TASK METHODS ====================
@@ -2794,13 +5679,19 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
             self._guidedStepError("Could not capture screenshot")
             return
         
-        # Extract OCR candidates
-        candidates = self._extractOcrCandidates(image)
+        # Extract OCR candidates off the GUI thread
+        self._requestOcr(image, lambda candidates: self._onGuidedStepOcr(step, target, image, candidates),
+                         locate=target)
+
+    def _onGuidedStepOcr(self, step, target, image, candidates):
+        """Continue a guided step once OCR of its screenshot is done"""
+        if not self.guided_controller.is_active() or self.guided_controller.get_current_step() is not step:
+            return  # Task was cancelled or moved on while OCR was running
         
         # Log candidates for debugging
         guided_logger.debug(f"OCR found {len(candidates)} candidates")
         if self.guided_controller.debug_guided_overlay:
-            guided_logger.debug(f"Candidates: {json.dumps(candidates[:20], indent=2)}")
+            guided_logger.debug(f"Candidates: {json.dumps(CandidateSet.coerce(candidates).to_dicts(20), indent=2)}")
         
         # Try local OCR matching for the target
         matched = self._guidedOcrMatch(target, candidates)
@@ -2820,6 +5711,10 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
             # Set waiting for confirmation
             self.guided_controller.set_waiting_for_confirm(best)
             self._showGuidedConfirmUI(target, best)
+        elif CandidateSet.coerce(candidates).partial:
+            # OCR stopped at a match this matcher rejects; the LLM must choose from the whole screen
+            guided_logger.info(f"No local match for '{target}' in a partial read, reading the whole screen")
+            self._requestOcr(image, lambda candidates: self._onGuidedStepOcr(step, target, image, candidates))
         else:
             # No local match - try LLM selection
             guided_logger.info(f"No local match for '{target}', trying LLM selection")
@@ -2827,41 +5722,39 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
     
     def _guidedOcrMatch(self, target, candidates):
         """Match target string against OCR candidates for guided tasks"""
-        import re
-        
         if not candidates or not target:
             return []
         
         target_lower = target.lower().strip()
-        target_tokens = set(re.split(r'[\s\W]+', target_lower))
+        candidate_set = CandidateSet.coerce(candidates)
+        
+        # Multi-word targets ("Network & Internet") resolve as one phrase box
+        ordered_terms = [t for t in _TERM_SPLIT.split(target_lower) if t]
+        if len(ordered_terms) >= 2:
+            phrases = candidate_set.phrases(ordered_terms)
+            if phrases:
+                guided_logger.debug(f"Phrase match for '{target}': {len(phrases)}")
+                return phrases
+        
+        target_tokens = set(_TERM_SPLIT.split(target_lower))
         target_tokens = {t for t in target_tokens if len(t) >= 2}
         
-        exact_matches = []
-        fuzzy_matches = []
+        text_index = candidate_set.text_index
         
-        for c in candidates:
-            text_lower = c["text"].lower().strip()
-            
-            # Exact full match
-            if target_lower == text_lower:
-                exact_matches.append(c)
-                continue
-            
-            # Target contained in text or vice versa
-            if target_lower in text_lower or text_lower in target_lower:
-                exact_matches.append(c)
-                continue
-            
-            # Token match
-            text_tokens = set(re.split(r'[\s\W]+', text_lower))
-            if target_tokens & text_tokens:
-                exact_matches.append(c)
-                continue
-            
-            # Fuzzy match for longer targets
-            if len(target_lower) >= 4 and c["confidence"] >= 0.6:
-                if self._levenshtein(target_lower, text_lower) <= 2:
-                    fuzzy_matches.append(c)
+        # Exact full match, target contained in text or vice versa (covers equality)
+        texts = set(text_index.containing(target_lower))
+        texts.update(text_index.contained_in(target_lower))
+        exact = set(text_index.positions(texts))
+        # Token match
+        exact.update(candidate_set.term_index.positions(target_tokens))
+        exact_matches = candidate_set.views(sorted(exact))
+        
+        # Fuzzy match for longer targets
+        fuzzy_matches = []
+        if len(target_lower) >= 4:
+            near = text_index.near(target_lower, 2)
+            fuzzy_matches = [c for c in candidate_set.views(text_index.positions(near))
+                             if c.index not in exact and c["confidence"] >= 0.6]
         
         if exact_matches:
             return exact_matches
@@ -2874,7 +5767,7 @@ x=pixels from left, y=pixels from top (use screenshot size for coordinates)."""
             return
         
         # Build strict JSON prompt
-        candidates_json = json.dumps(candidates[:50], indent=2)  # Limit to 50 candidates
+        candidates_json = json.dumps(CandidateSet.coerce(candidates).to_dicts(50), indent=2)  # Limit to 50 candidates
         
         prompt = f"""You must select ONE candidate from the list below that best matches the target UI element.
 Return JSON only. Do NOT invent coordinates.
@@ -2901,7 +5794,8 @@ Rules:
             "image": image
         }
         
-        self.gemini_worker = GeminiWorker("Select candidate", self.api_key, image_data=image, system_prompt=prompt)
+        self.gemini_worker = GeminiWorker("Select candidate", self.api_key, image_data=image, system_prompt=prompt,
+                                          payload_kind="selection")
         self.gemini_worker.response_received.connect(self._onGuidedLLMResponse)
         self.gemini_worker.error_occurred.connect(self._onGuidedLLMError)
         self.gemini_worker.finished.connect(self.onWorkerFinished)
@@ -3170,6 +6064,7 @@ Rules:
         self.conv_current_page = None
         self.conv_target_word = None
         self.conv_screenshot = None
+        self.conv_cache_keys = []
         
         # Show user message
         user_msg = f"""
@@ -3249,6 +6144,7 @@ Rules:
         self.conv_current_page = None
         self.conv_target_word = None
         self.conv_screenshot = None
+        self.conv_cache_keys = []
         
         # Restart 6-step pipeline from Step 1
         print(f"[PIPELINE] Restarting cycle. Context: {self.conv_context}")
@@ -3281,6 +6177,7 @@ Rules:
         self.conv_current_page = None
         self.conv_target_word = None
         self.conv_screenshot = None
+        self.conv_cache_keys = []
         self.overlay.closeOverlay()
         
         end_msg = f"""
@@ -3351,7 +6248,8 @@ No explanation, just the action."""
         self.send_button.setEnabled(False)
         
         # AI call WITHOUT image
-        self.gemini_worker = GeminiWorker("define step", self.api_key, image_data=None, system_prompt=prompt)
+        self.gemini_worker = GeminiWorker("define step", self.api_key, image_data=None, system_prompt=prompt,
+                                          cache_response=True)
         self.gemini_worker.response_received.connect(self._onStep1Response)
         self.gemini_worker.error_occurred.connect(self._onConvStepError)
         self.gemini_worker.finished.connect(lambda: None)  # Don't re-enable yet
@@ -3359,6 +6257,7 @@ No explanation, just the action."""
     
     def _onStep1Response(self, response_text):
         """Handle Step 1 response - store initial step and proceed to Step 2"""
+        self._convRememberCacheKey()
         # Remove thinking indicator
         self._removeLastMessage()
         
@@ -3401,7 +6300,8 @@ Reply with ONLY 1-3 words identifying it (e.g., "Desktop", "Settings Home", "Sys
 No explanation, just the page name."""
         
         # AI call WITH image
-        self.gemini_worker = GeminiWorker("identify page", self.api_key, image_data=self.conv_screenshot, system_prompt=prompt)
+        self.gemini_worker = GeminiWorker("identify page", self.api_key, image_data=self.conv_screenshot, system_prompt=prompt,
+                                          payload_kind="identify_page")
         self.gemini_worker.response_received.connect(self._onStep2Response)
         self.gemini_worker.error_occurred.connect(self._onConvStepError)
         self.gemini_worker.finished.connect(lambda: None)
@@ -3453,7 +6353,8 @@ If goal is already complete on this screen, reply "GOAL_COMPLETE".
 No explanation, just the word to click."""
         
         # AI call WITHOUT image (we already know the page)
-        self.gemini_worker = GeminiWorker("refine target", self.api_key, image_data=None, system_prompt=prompt)
+        self.gemini_worker = GeminiWorker("refine target", self.api_key, image_data=None, system_prompt=prompt,
+                                          cache_response=True)
         self.gemini_worker.response_received.connect(self._onStep3Response)
         self.gemini_worker.error_occurred.connect(self._onConvStepError)
         self.gemini_worker.finished.connect(lambda: None)
@@ -3464,11 +6365,14 @@ No explanation, just the word to click."""
         # Remove thinking indicator
         self._removeLastMessage()
         
+        self._convRememberCacheKey()
         self.conv_target_word = response_text.strip().strip('"').strip("'")
         print(f"[STEP 3] Target word: '{self.conv_target_word}'")
         
         # Check for goal complete
         if "GOAL_COMPLETE" in self.conv_target_word.upper():
+            # Asking again for the same goal means the user disputes this; don't replay it
+            self._convEvictCachedReplies()
             self._endConversationalGuidance("Goal appears complete!")
             self.onWorkerFinished()
             return
@@ -3476,7 +6380,14 @@ No explanation, just the word to click."""
         # Step 4: Locate target via OCR
         print(f"[STEP 4] Locating '{self.conv_target_word}' via OCR...")
         
-        candidates = self._extractOcrCandidates(self.conv_screenshot)
+        screenshot = self.conv_screenshot
+        self._requestOcr(screenshot, lambda candidates: self._onStep4Ocr(screenshot, candidates),
+                         locate=self.conv_target_word)
+
+    def _onStep4Ocr(self, screenshot, candidates):
+        """Steps 4-6 once OCR of the conversation screenshot is done"""
+        if self.conv_screenshot is not screenshot:
+            return  # Guidance ended or moved to a newer screenshot meanwhile
         if not candidates:
             self._convShowError("Could not read screen text.")
             self.onWorkerFinished()
@@ -3485,7 +6396,7 @@ No explanation, just the word to click."""
         # Find matching candidate
         matched = self._localOcrMatch(self.conv_target_word, candidates)
         
-        # Step 5: Stop immediately once found
+        # Step 5: OCR already stopped at the first confident exact match (StreamingLocator)
         print(f"[STEP 5] Match found: {len(matched) if matched else 0} candidates")
         
         if matched:
@@ -3518,8 +6429,13 @@ No explanation, just the word to click."""
                 <i>After you click, say "next" to continue.</i>
             </div>
             """)
+        elif CandidateSet.coerce(candidates).partial:
+            # OCR stopped at a match this matcher rejects; check the rest of the screen before giving up
+            self._requestOcr(screenshot, lambda candidates: self._onStep4Ocr(screenshot, candidates))
+            return
         else:
-            # Target not found on screen
+            # Target not found on screen; the retry after "next" must ask the model again
+            self._convEvictCachedReplies()
             self.message_area.append(f"""
             <div style="color: rgba(255, 200, 150, 0.9); padding: 8px;">
                 ⚠️ Could not find "{self.conv_target_word}" on screen. 
@@ -3530,6 +6446,19 @@ No explanation, just the word to click."""
         self.scrollToBottom()
         self.onWorkerFinished()
     
+    def _convRememberCacheKey(self):
+        """Note the cache key of the reply just received (if it was cached)"""
+        key = self.gemini_worker.cache_key if self.gemini_worker else None
+        if key:
+            self.conv_cache_keys.append(key)
+
+    def _convEvictCachedReplies(self):
+        """Drop this cycle's cached replies so a retry asks the model again"""
+        if response_cache:
+            for key in self.conv_cache_keys:
+                response_cache.evict(key)
+        self.conv_cache_keys = []
+
     def _convShowError(self, msg):
         """Show error message in chat"""
         self.message_area.append(f"""
@@ -3551,28 +6480,74 @@ No explanation, just the word to click."""
     def _captureOverlayScreenshot(self):
         """Capture a fresh screenshot for overlay accuracy"""
         try:
-            was_expanded = self.is_expanded
-            window_pos = self.pos()
-            overlay_visible = self.overlay.isVisible()
-
-            # Hide UI to avoid covering target
-            self.hide()
-            self.overlay.hide()
-            QApplication.processEvents()
-
-            screenshot = ImageGrab.grab()
-
-            # Restore UI
-            self.show()
-            if overlay_visible:
-                self.overlay.show()
-            if was_expanded:
-                self.expandToChat()
-                self.move(window_pos)
-            return screenshot
+            if self.capture_exclusion_mode:
+                return Frame(self._grabExcludingSelf())
+            return Frame(self._grabHidingSelf())
         except Exception:
             # Fall back to latest screenshot if capture fails
             return self.latest_screenshot
+
+    def _grabHidingSelf(self):
+        """Legacy capture: hide our windows, grab, then restore them"""
+        was_expanded = self.is_expanded
+        window_pos = self.pos()
+        overlay_visible = self.overlay.isVisible()
+
+        # Hide UI to avoid covering target
+        self.hide()
+        self.overlay.hide()
+        QApplication.processEvents()
+
+        screenshot = screen_source.grab()
+
+        # Restore UI
+        self.show()
+        if overlay_visible:
+            self.overlay.show()
+        if was_expanded:
+            self.expandToChat()
+            self.move(window_pos)
+        return screenshot
+
+    def _ownWindowRects(self, image_size):
+        """Regions covered by our own windows, as (left, top, right, bottom) screenshot pixels"""
+        virtual = QGuiApplication.primaryScreen().virtualGeometry()
+        img_w, img_h = image_size
+        sx = img_w / float(virtual.width()) if virtual.width() > 0 else 1.0
+        sy = img_h / float(virtual.height()) if virtual.height() > 0 else 1.0
+
+        global_rects = []
+        if self.isVisible():
+            global_rects.append(self.frameGeometry())
+        if self.overlay.isVisible():
+            for rect in self.overlay.paintedRects():
+                global_rects.append(QRect(self.overlay.mapToGlobal(rect.topLeft()), rect.size()))
+
+        rects = []
+        for g in global_rects:
+            # Round outwards so anti-aliased edges are covered too
+            rects.append((
+                int((g.x() - virtual.x()) * sx) - 1,
+                int((g.y() - virtual.y()) * sy) - 1,
+                int((g.x() + g.width() - virtual.x()) * sx + 0.999) + 1,
+                int((g.y() + g.height() - virtual.y()) * sy + 0.999) + 1,
+            ))
+        return rects
+
+    def _grabExcludingSelf(self):
+        """Grab without hiding anything, then mask out our own windows (see WindowMasker)"""
+        screenshot = screen_source.grab()
+        self.window_masker.set_rects(self._ownWindowRects(screenshot.size))
+        return self.window_masker.apply(screenshot)
+
+    def _updateCaptureMask(self, image_size=None):
+        """Tell the monitoring capture thread where our windows are now"""
+        if image_size is None:
+            latest = self.latest_screenshot
+            if latest is None:
+                return
+            image_size = latest.size
+        self.window_masker.set_rects(self._ownWindowRects(image_size))
     
     def captureScreenshot(self):
         """Capture full screen screenshot and send to AI for analysis"""
@@ -3581,31 +6556,28 @@ No explanation, just the word to click."""
             was_expanded = self.is_expanded
             window_pos = self.pos()
             
-            # Temporarily hide the window
-            self.hide()
-            
-            # Small delay to ensure window is fully hidden
-            QApplication.processEvents()
-            
-            # Capture full screen
-            screenshot = ImageGrab.grab()
-            
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"screenshot_{timestamp}.png"
-            
-            # Save to temp directory
-            temp_dir = tempfile.gettempdir()
-            filepath = os.path.join(temp_dir, filename)
-            screenshot.save(filepath, "PNG")
+            if self.capture_exclusion_mode:
+                # Capture full screen with our windows masked out (no hide/show flicker)
+                screenshot = self._grabExcludingSelf()
+            else:
+                # Temporarily hide the window
+                self.hide()
+                
+                # Small delay to ensure window is fully hidden
+                QApplication.processEvents()
+                
+                # Capture full screen
+                screenshot = screen_source.grab()
             
-            # Store the screenshot path for AI analysis
-            self.last_screenshot_path = filepath
+            # Keep the image in memory; the worker encodes it off the GUI thread
+            screenshot = Frame(screenshot)
+            self.last_screenshot = screenshot
             
             # Restore window
-            self.show()
-            self.raise_()
-            self.activateWindow()
+            if not self.capture_exclusion_mode:
+                self.show()
+                self.raise_()
+                self.activateWindow()
             
             # Restore window state if it was expanded
             if was_expanded:
@@ -3624,7 +6596,7 @@ No explanation, just the word to click."""
                         padding: 12px 16px; 
                         margin: 8px 0; 
                         color: rgba(255, 255, 255, 0.8);">
-                <b>System:</b> Screenshot captured: <code style="background: rgba(0, 0, 0, 0.2); padding: 2px 6px; border-radius: 4px;">{filepath}</code>
+                <b>System:</b> Screenshot captured ({screenshot.width}x{screenshot.height})
             </div>
             """
             self.message_area.append(system_msg)
@@ -3642,7 +6614,7 @@ No explanation, just the word to click."""
             self.scrollToBottom()
             
             # Send screenshot to AI for analysis
-            self.analyzeScreenshot(filepath)
+            self.analyzeScreenshot(screenshot)
                 
         except Exception as e:
             # Show error message
@@ -3663,7 +6635,7 @@ No explanation, just the word to click."""
             self.message_area.append(error_msg)
             self.scrollToBottom()
     
-    def analyzeScreenshot(self, filepath):
+    def analyzeScreenshot(self, image):
         """Send screenshot to AI for analysis"""
         if not self.api_key:
             error_msg = """
@@ -3688,7 +6660,7 @@ No explanation, just the word to click."""
         
         # Create and start worker thread with image
         prompt = "Describe what you see in this screenshot. Be brief and focus on the main content visible."
-        self.gemini_worker = GeminiWorker(prompt, self.api_key, image_path=filepath)
+        self.gemini_worker = GeminiWorker(prompt, self.api_key, image_data=image, payload_kind="analysis")
         self.gemini_worker.response_received.connect(self.onScreenshotAnalyzed)
         self.gemini_worker.error_occurred.connect(self.onAIError)
         self.gemini_worker.retry_attempt.connect(self.onRetryAttempt)
@@ -3748,7 +6720,7 @@ No explanation, just the word to click."""
         self.screen_monitoring_enabled = not self.screen_monitoring_enabled
         
         if self.screen_monitoring_enabled:
-            self.screen_monitor_timer.start(3000)  # 3 seconds
+            self._startScreenCapture()
             status_msg = """
             <div style="background: rgba(80, 200, 255, 0.15); 
                         border: 1px solid rgba(80, 200, 255, 0.3); 
@@ -3767,7 +6739,7 @@ No explanation, just the word to click."""
             """)
             self.context_panel.show() # Show context panel
         else:
-            self.screen_monitor_timer.stop()
+            self._stopScreenCapture()
             status_msg = """
             <div style="background: rgba(255, 255, 255, 0.1); 
                         border-radius: 12px; 
@@ -3854,34 +6826,78 @@ No explanation, just the word to click."""
         self.input_field.setText(prompt)
         self.sendMessage()
         
-    def _calculateScreenHash(self, image):
-        """Calculate simple hash for screen diffing"""
-        try:
-            from PIL import ImageOps
-            # Resize for performance and noise tolerance
-            thumb = image.resize((64, 64), Image.Resampling.LANCZOS)
-            gray = ImageOps.grayscale(thumb)
-            return hash(gray.tobytes())
-        except:
-            return 0
-
-    def _autoCapture(self):
-        """Auto-capture screenshot for monitoring (silent, no AI call)"""
+    @property
+    def latest_screenshot(self):
+        """Newest monitoring Frame from the capture ring (None until the first capture)"""
+        return self.frame_ring.latest()
+
+    def _startScreenCapture(self):
+        """Start the background capture thread (adaptive interval)"""
+        if self.capture_worker:
+            return
+        self.frame_ring.clear()
+        self._last_processed_seq = 0
+        # Monitoring frames are masked like on-demand captures, so their tiles share OCR cache keys
+        # and our overlay never counts as a screen change
+        self.capture_worker = ScreenCaptureWorker(self.frame_ring, AdaptiveCaptureScheduler(),
+                                                  phash_size=self.follow_manager.phash_size,
+                                                  masker=self.window_masker)
+        self.capture_worker.frame_ready.connect(self._autoCapture)
+        self.capture_worker.start()
+        if self.speculative_ocr_enabled:
+            self.prewarm_worker = OcrPrewarmWorker(ocr_cache, is_busy=self.ocr_worker.busy,
+                                                   profiles=self.ocr_profiles)
+            self.prewarm_worker.start(QThread.IdlePriority)
+
+    def _stopScreenCapture(self):
+        """Stop the background capture thread"""
+        if self.capture_worker:
+            self.capture_worker.stop()
+            self.capture_worker = None
+        if self.prewarm_worker:
+            self.prewarm_worker.stop()
+            self.prewarm_worker = None
+            prewarmed, prewarm_hits = ocr_cache.prewarm_stats()
+            guided_logger.info(f"Speculative OCR: {prewarmed} tiles prewarmed, {prewarm_hits} used, "
+                               f"{ocr_cache.hit_rate():.0%} tile hit rate")
+
+    def _boostScreenCapture(self):
+        """Poll fast for a few seconds (e.g. right after a step overlay is shown)"""
+        if self.capture_worker:
+            self._updateCaptureMask()
+            self.capture_worker.boost()
+
+    def _autoCapture(self, seq):
+        """Handle new monitoring frames from the capture thread (silent, no AI call)"""
         try:
-            # Capture without hiding window (background capture)
-            screenshot = ImageGrab.grab()
+            # Frames can arrive faster than the GUI handles them; consume every unseen one
+            new_frames = self.frame_ring.since(self._last_processed_seq)
+            if not new_frames:
+                return
+            frame = new_frames[-1]
+            self._last_processed_seq = frame.seq
             
-            # Optimization: Check hash to skip redundant analysis
-            current_hash = self._calculateScreenHash(screenshot)
-            is_screen_same = (current_hash == getattr(self, 'last_screen_hash_val', None))
-            self.last_screen_hash_val = current_hash
+            # Optimization: Diff tiles to skip redundant analysis
+            screen_diff = frame.screen_diff
+            is_screen_same = not any(f.screen_diff.significant for f in new_frames)
+            self.last_screen_diff = screen_diff
+            self.last_capture_time = frame.timestamp
+            self._updateCaptureMask(frame.size)
+            if self.capture_worker:
+                self.context_panel.updateCaptureStats(*self.capture_worker.scheduler.stats())
             
-            self.latest_screenshot = screenshot
-            self.last_capture_time = datetime.now()
+            # Read changed tiles ahead of time so a later OCR request mostly hits the cache
+            if self.prewarm_worker and not is_screen_same:
+                rects = [(l, t, l + w, t + h) for f in new_frames for l, t, w, h in f.screen_diff.changedRects()]
+                self.prewarm_worker.submit(frame, rects)
             
             # GUIDED MODE: Check if user completed the current step
             if self.follow_manager.guided_mode and self.follow_manager.waiting_for_completion:
-                step_completed = self.follow_manager.checkStepCompletion(current_hash)
+                step_completed = False
+                for f in new_frames:
+                    step_completed = self.follow_manager.checkStepCompletion(f)
+                    if step_completed:
+                        break
                 if step_completed:
                     # User completed the step! Advance and request next step
                     self.follow_manager.advanceStep()
@@ -3894,7 +6910,7 @@ No explanation, just the word to click."""
             
             # Follow-Along Logic: Check for screen changes
             if self.follow_manager.active:
-                changed = self.follow_manager.checkScreenChange(screenshot)
+                changed = self.follow_manager.checkScreenChange(frame, screen_diff)
                 if changed and self.overlay.isVisible():
                      pass
             
@@ -3908,7 +6924,7 @@ No explanation, just the word to click."""
                 if not is_screen_same:
                     self.is_analyzing = True
                     self.context_panel.setStatus("ANALYZING")
-                    self.analysis_worker = AnalysisWorker(screenshot, self.api_key)
+                    self.analysis_worker = AnalysisWorker(frame, self.api_key)
                     self.analysis_worker.finished.connect(self.onAnalysisFinished)
                     self.analysis_worker.start()
             
@@ -3937,10 +6953,20 @@ No explanation, just the word to click."""
         self.input_field.setEnabled(False)
         self.send_button.setEnabled(False)
         
+        # Use latest screenshot
+        current_image = self.latest_screenshot
+        
         # Get screen resolution
         screen_geom = QGuiApplication.primaryScreen().virtualGeometry()
         res_info = f"Screen Resolution: {screen_geom.width()}x{screen_geom.height()}"
         
+        # The model sees a downscaled copy; coordinates come back in that space
+        transform = None
+        if current_image:
+            transform = payload_policy.plan(current_image.size, "coordinates")
+            res_info += f"\nScreenshot size: {transform.payload_size[0]}x{transform.payload_size[1]} (give coordinates in screenshot pixels)"
+        self.pending_shape_transform = transform
+        
         system_prompt = f"""You are a step-by-step screen guidance assistant.
 
 USER GOAL: "{task_goal}"
@@ -3967,10 +6993,8 @@ RULES:
 
 Continue from step {step_num}."""
         
-        # Use latest screenshot
-        current_image = self.latest_screenshot
-        
-        self.gemini_worker = GeminiWorker("Continue to next step", self.api_key, image_data=current_image, system_prompt=system_prompt)
+        self.gemini_worker = GeminiWorker("Continue to next step", self.api_key, image_data=current_image, system_prompt=system_prompt,
+                                          payload_transform=transform)
         self.gemini_worker.response_received.connect(self.onAIResponse)
         self.gemini_worker.error_occurred.connect(self.onAIError)
         self.gemini_worker.retry_attempt.connect(self.onRetryAttempt)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from circular_window import CandidateSet
+
+
+def word(ocr_id, text, left, top, width, height, confidence, line_key=None):
+    w = {"ocr_id": ocr_id, "text": text, "left": left, "top": top, "width": width, "height": height,
+         "confidence": confidence}
+    if line_key is not None:
+        w["line_key"] = line_key
+    return w
+
+
+@pytest.fixture
+def candidates():
+    return CandidateSet([
+        word(1, "Network", 10, 10, 60, 12, 0.95, (1, 1, 1)),
+        word(2, "&", 74, 10, 8, 12, 0.40, (1, 1, 1)),
+        word(3, "Internet", 86, 10, 60, 12, 0.90, (1, 1, 1)),
+        word(4, "Sound", 10, 40, 40, 12, 0.95, (1, 1, 2)),
+        word(5, "Bluetooth_devices", 10, 70, 120, 12, 0.60, (1, 1, 3)),
+        word(6, "OK", 200, 70, 40, 12, 0.90, (1, 1, 3)),
+    ])
+
+
+def test_views_read_like_dicts(candidates):
+    first = candidates[0]
+    assert first.to_dict() == {"ocr_id": 1, "text": "Network", "left": 10, "top": 10, "width": 60, "height": 12,
+                               "confidence": 0.95}
+    assert candidates[-1]["text"] == "OK"
+    assert first.get("missing", "default") == "default"
+    with pytest.raises(IndexError):
+        candidates[6]
+    assert [c["ocr_id"] for c in candidates[1:3]] == [2, 3]
+    assert candidates.to_dicts(2) == [c.to_dict() for c in candidates[:2]]
+
+
+def test_tokens_and_terms(candidates):
+    assert candidates[4].tokens == ("bluetooth", "devices")  # Tokens split on underscores
+    assert candidates[4].terms == frozenset({"bluetooth_devices"})  # Terms keep them
+    assert candidates[1].terms == frozenset()
+
+
+def test_confident_mask(candidates):
+    mask = candidates.confident_mask(0.9)
+    assert mask.tolist() == [True, False, True, True, False, True]
+
+
+def test_smallest_orders_by_area_and_keeps_ocr_order_on_ties(candidates):
+    assert [c["text"] for c in candidates.smallest()] == ["&", "Sound", "OK", "Network", "Internet",
+                                                          "Bluetooth_devices"]
+    mask = candidates.confident_mask(0.9)
+    assert [c["text"] for c in candidates.smallest(mask, limit=2)] == ["Sound", "OK"]
+
+
+def test_most_confident_keeps_ocr_order_on_ties(candidates):
+    assert [c["ocr_id"] for c in candidates.most_confident()] == [1, 4, 3, 6, 5, 2]
+    assert [c["ocr_id"] for c in candidates.most_confident(limit=1)] == [1]
+
+
+def test_coerce_converts_lists_and_keeps_sets(candidates):
+    assert CandidateSet.coerce(candidates) is candidates
+    assert len(CandidateSet.coerce(None)) == 0
+    converted = CandidateSet.coerce([word(9, "Apply", 0, 0, 10, 10, 0.5)])
+    assert isinstance(converted, CandidateSet) and converted[0]["ocr_id"] == 9
+    assert CandidateSet([]).boxes.shape == (0, 5)
+
+
+def test_phrases_merge_words_on_one_line(candidates):
+    phrases = candidates.phrases(["network", "internet"])
+    assert phrases == [{"ocr_id": 1, "text": "Network & Internet", "left": 10, "top": 10, "width": 136,
+                        "height": 12, "confidence": 0.40}]
+    assert candidates.phrases(["sound", "network"]) == []
+
+
+def test_indexes_are_built_once_and_lazily(candidates):
+    assert candidates._indexes == {}
+    assert candidates.term_index is candidates.term_index
+    assert set(candidates._indexes) == {"terms"}
+    assert candidates.views(candidates.text_index.positions(["sound"]))[0]["ocr_id"] == 4
+    assert np.array_equal(candidates.areas, candidates.boxes[:, 3] * candidates.boxes[:, 4])
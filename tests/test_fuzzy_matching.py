@@ -0,0 +1,72 @@
+import itertools
+import random
+
+import pytest
+
+from circular_window import DeletionIndex, TermIndex, bounded_levenshtein
+
+
+def brute_levenshtein(a, b):
+    """Textbook full-matrix edit distance"""
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def random_words(count, alphabet="abcd", max_len=7, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len))) for _ in range(count)]
+
+
+def test_bounded_levenshtein_matches_brute_force():
+    words = random_words(60)
+    for a, b in itertools.product(words, repeat=2):
+        exact = brute_levenshtein(a, b)
+        for k in range(4):
+            expected = exact if exact <= k else k + 1
+            assert bounded_levenshtein(a, b, k) == expected, (a, b, k)
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("", "", 0), ("", "abc", 3), ("settings", "settings", 0),
+    ("settings", "setings", 1), ("sound", "suond", 2), ("network", "netwrok", 2),
+])
+def test_bounded_levenshtein_known_pairs(a, b, distance):
+    assert bounded_levenshtein(a, b, 5) == distance
+    assert bounded_levenshtein(b, a, 5) == distance
+
+
+def test_deletion_index_query_matches_brute_force():
+    vocabulary = sorted(set(random_words(200, seed=1)))
+    index = DeletionIndex(vocabulary, max_distance=2)
+    for query in random_words(40, seed=2):
+        for k in range(3):
+            expected = {w for w in vocabulary if brute_levenshtein(query, w) <= k}
+            assert set(index.query(query, k)) == expected, (query, k)
+
+
+def test_deletion_index_rejects_distance_above_build_distance():
+    index = DeletionIndex(["sound"], max_distance=1)
+    with pytest.raises(ValueError):
+        index.query("sound", 2)
+
+
+def test_term_index_positions_and_substrings():
+    index = TermIndex([("network", "internet"), ("sound",), ("internet",), ()])
+    assert index.positions(["internet"]) == [0, 2]
+    assert index.positions(["sound", "missing"]) == [1]
+    assert sorted(index.containing("net")) == ["internet", "network"]
+    assert index.containing("so") == ["sound"]  # Shorter than a trigram
+    assert sorted(index.contained_in("soundnetwork")) == ["network", "sound"]
+
+
+def test_term_index_near_builds_fuzzy_index_on_demand():
+    index = TermIndex([("settings",), ("sound",), ("system",)])
+    assert index._fuzzy is None
+    assert index.near("setings", 1) == ["settings"]
+    assert sorted(index.near("sytem", 2)) == ["system"]
+    assert index.fuzzy_index(3).max_distance == 3  # Rebuilt for a larger distance
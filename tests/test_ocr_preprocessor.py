@@ -0,0 +1,55 @@
+import numpy as np
+from PIL import Image
+
+from circular_window import OcrPreprocessor, create_ocr_preprocessor
+
+
+def test_default_passes_frames_through():
+    image = Image.new("RGB", (40, 30), "navy")
+    assert create_ocr_preprocessor("").spec == "none"
+    assert OcrPreprocessor().apply(image) == (image, (1.0, 1.0))
+
+
+def test_dark_regions_all_none_or_a_pixel_mask():
+    preprocessor = OcrPreprocessor(grayscale=True, invert="auto")
+    assert preprocessor._dark_regions(np.full((50, 70), 20, dtype=np.uint8)) is True
+    assert preprocessor._dark_regions(np.full((50, 70), 235, dtype=np.uint8)) is None
+
+    # Dark sidebar next to a light pane, at a size that is not a multiple of the block size
+    pixels = np.full((100, 250), 235, dtype=np.uint8)
+    pixels[:, :96] = 20
+    mask = preprocessor._dark_regions(pixels)
+    assert mask.shape == pixels.shape
+    assert mask[:, :64].all() and not mask[:, 128:].any()
+
+
+def test_dark_text_on_light_is_not_a_dark_region():
+    pixels = np.full((96, 192), 235, dtype=np.uint8)
+    pixels[40:56, 16:176:8] = 0  # Glyph strokes, thinner than the averaging window
+    assert OcrPreprocessor(invert="auto")._dark_regions(pixels) is None
+
+
+def test_auto_invert_only_flips_the_dark_region():
+    pixels = np.full((64, 256), 235, dtype=np.uint8)
+    pixels[:, :128] = 20
+    processed, _ = OcrPreprocessor(grayscale=True, invert="auto").apply(Image.fromarray(pixels))
+    processed = np.asarray(processed)
+    assert processed[:, :64].min() == 235 and processed[:, 192:].max() == 235
+
+
+def test_to_source_maps_boxes_back_through_the_scale():
+    candidates = [{"left": 10, "top": 5, "width": 21, "height": 7}]
+    assert OcrPreprocessor.to_source(candidates, (0.5, 0.5)) == [{"left": 20, "top": 10, "width": 42, "height": 14}]
+    # Far edges are mapped, not sizes, so rounding never drifts a box off its word
+    candidates = [{"left": 1, "top": 1, "width": 1, "height": 1}]
+    assert OcrPreprocessor.to_source(candidates, (3.0, 2.0)) == [{"left": 0, "top": 0, "width": 1, "height": 1}]
+    unchanged = [{"left": 3, "top": 4, "width": 5, "height": 6}]
+    assert OcrPreprocessor.to_source(unchanged, (1.0, 1.0)) is unchanged
+
+
+def test_to_source_round_trips_a_scaled_image():
+    preprocessor = OcrPreprocessor(scale=0.5)
+    processed, scale = preprocessor.apply(Image.new("RGB", (301, 201), "white"))
+    assert processed.size == (150, 100) and scale == (150 / 301.0, 100 / 201.0)
+    box = preprocessor.to_source([{"left": 75, "top": 50, "width": 75, "height": 50}], scale)[0]
+    assert (box["left"] + box["width"], box["top"] + box["height"]) == (301, 201)
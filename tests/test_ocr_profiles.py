@@ -0,0 +1,115 @@
+import json
+
+import pytest
+from PIL import Image, ImageDraw
+
+from circular_window import (Frame, OcrPrewarmWorker, OcrProfile, OcrProfileStore, StreamingLocator,
+                              TileOcrCache, foreground_app_name)
+from test_tile_ocr_cache import WORDS, make_cache, screen
+
+
+def page(seed):
+    image = Image.new("RGB", (320, 240), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(6):
+        x = (seed * 53 + i * 47) % 280
+        y = (seed * 31 + i * 37) % 200
+        draw.rectangle((x, y, x + 30, y + 20), fill="black")
+    return Frame(image)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OcrProfileStore(path=str(tmp_path / "ocr_profiles.json"))
+
+
+def test_profile_dict_round_trip():
+    profile = OcrProfile(psm=11, oem=1, scale=0.5)
+    assert OcrProfile.from_dict(profile.to_dict()) == profile
+    assert profile.config == "--psm 11 --oem 1"
+    assert OcrProfile().is_default and not profile.is_default
+
+
+def test_choose_keeps_the_default_until_other_profiles_are_explored(store):
+    frame = page(1)
+    store.record("settings.exe", frame, OcrProfile(), 300.0, True, tiles=2, target="Bluetooth")
+    assert store.choose("settings.exe", frame) == OcrProfile()
+    explored = []
+    while choice := store.explore("settings.exe", frame):
+        profile, target = choice
+        assert target == "Bluetooth"
+        explored.append(profile)
+        store.record("settings.exe", frame, profile, 100.0 if profile.psm == 11 else 300.0, True, 2, target)
+    assert explored == list(OcrProfileStore.CANDIDATES[1:])
+    assert store.choose("settings.exe", frame) == OcrProfile(psm=11)
+    assert store.best("other.exe", frame) is None
+    assert store.choose("other.exe", frame) == OcrProfile()
+
+
+def test_pages_without_a_found_target_are_not_explored(store):
+    frame = page(6)
+    store.record("app", frame, None, 200.0, False, tiles=2, target="Missing")
+    assert store.explore("app", frame) is None
+    assert store.explore("unknown", frame) is None
+
+
+def test_prewarm_worker_explores_untried_profiles(store):
+    cache, _ = make_cache(tile_size=100, overlap=20)
+    frame = Frame(screen(WORDS))
+    app = foreground_app_name()  # What the worker sees; None off Windows
+    StreamingLocator("w30", cache=cache, profiles=store, app=app).run(frame)
+    assert store.explore(app, frame) == (OcrProfile(psm=11), "w30")
+    OcrPrewarmWorker(cache, cpu_budget=1.0, profiles=store)._explore(frame)
+    assert store.explore(app, frame) is None
+    stats = store._pages[0]["stats"]
+    assert set(stats) == {profile.key for profile in OcrProfileStore.CANDIDATES}
+    assert stats[OcrProfile(psm=11).key][2] == 1  # Found the target too
+
+
+def test_match_rate_beats_speed_and_cached_runs_carry_no_latency(store):
+    frame = page(2)
+    store.record("app", frame, OcrProfile(), 0.0, True, tiles=0)  # Answered from the cache
+    store.record("app", frame, OcrProfile(psm=6), 50.0, False, tiles=1)
+    store.record("app", frame, OcrProfile(psm=11), 400.0, True, tiles=1)
+    assert store.best("app", frame) == OcrProfile(psm=11)  # Default has no timed run yet
+
+
+def test_save_and_load_round_trip(store, tmp_path):
+    frames = [page(3), page(4)]
+    store.record("explorer.exe", frames[0], OcrProfile(psm=11), 120.0, True, tiles=3, target="Downloads")
+    store.record("explorer.exe", frames[0], OcrProfile(scale=0.5), 90.0, False, tiles=3)
+    store.record("settings.exe", frames[1], None, 200.0, True, tiles=2)
+    store.save()
+
+    loaded = OcrProfileStore(path=store.path)
+    assert loaded._pages == store._pages
+    assert loaded.best("explorer.exe", frames[0]) == OcrProfile(psm=11)
+    assert loaded.best("settings.exe", frames[1]) == OcrProfile()
+    assert loaded.explore("explorer.exe", frames[0]) == (OcrProfile(), "Downloads")
+
+    data = json.loads((tmp_path / "ocr_profiles.json").read_text())
+    assert data["version"] == 2
+    loaded.save()  # Nothing new learned: the file is left alone
+    assert json.loads((tmp_path / "ocr_profiles.json").read_text()) == data
+
+
+def test_version_1_latencies_are_dropped_on_load(tmp_path):
+    path = tmp_path / "ocr_profiles.json"
+    path.write_text(json.dumps({"version": 1, "pages": [{"app": "a", "phash": "ff", "stats": [
+        {"profile": {"psm": 11, "oem": None, "scale": 1.0}, "runs": 2, "matches": 1, "total_ms": 500.0}]}]}))
+    stats = OcrProfileStore(path=str(path))._pages[0]["stats"]
+    assert list(stats.values()) == [[OcrProfile(psm=11), 2, 1, 0.0, 0]]
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / "ocr_profiles.json"
+    path.write_text("{not json")
+    assert OcrProfileStore(path=str(path))._pages == []
+
+
+def test_profile_downscale_does_not_compound_with_hidpi():
+    gray = page(5).gray()
+    hidpi = TileOcrCache(text_scale=0.5)
+    assert hidpi.read_profile(gray, OcrProfile(scale=0.5)).scale == 0.5
+    assert TileOcrCache(text_scale=1.0).read_profile(gray, OcrProfile(scale=0.5)).scale == 0.5
+    assert TileOcrCache(text_scale=1.0).read_profile(gray, OcrProfile(psm=6)) == OcrProfile(psm=6)
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from circular_window import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl=60, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_key_normalizes_whitespace_only():
+    key = ResponseCache.key("model", "Goal: test speaker\n  Current screen:\tSettings")
+    assert key == ResponseCache.key("model", " Goal: test speaker Current screen: Settings ")
+    assert key != ResponseCache.key("model", "goal: test speaker current screen: settings")
+    assert key != ResponseCache.key("other-model", "Goal: test speaker Current screen: Settings")
+    assert key != ResponseCache.key("model", "Goal: test speaker Current screen: Settings", b"image digest")
+
+
+def test_database_is_opened_on_first_use(tmp_path):
+    path = tmp_path / "lazy.sqlite3"
+    cache = ResponseCache(str(path))
+    assert not path.exists()
+    assert cache.get("missing") is None
+    assert path.exists()
+    cache.close()
+
+
+def test_get_put_and_stats(cache):
+    assert cache.get("a") is None
+    cache.put("a", "model", "Sound")
+    assert cache.get("a") == "Sound"
+    assert cache.stats() == (1, 1, 1)
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("a", "model", "Sound")
+    clock.now += 59
+    assert cache.get("a") == "Sound"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()[2] == 0
+
+
+def test_lru_keeps_recent_entries_in_memory_and_the_rest_on_disk(cache):
+    cache.put("a", "model", "1")
+    cache.put("b", "model", "2")
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", "model", "3")
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.get("b") == "2"  # Read back from SQLite
+    assert list(cache._entries) == ["c", "b"]
+
+
+def test_entries_survive_a_restart_until_they_expire(tmp_path, clock):
+    path = str(tmp_path / "responses.sqlite3")
+    first = ResponseCache(path, ttl=60)
+    first.put("a", "model", "Sound")
+    first.put("b", "model", "System")
+    first.close()
+    clock.now += 30
+    first = ResponseCache(path, ttl=60)
+    first.put("b", "model", "Display")
+    first.close()
+    clock.now += 40
+    second = ResponseCache(path, ttl=60)
+    assert second.get("a") is None  # Expired while closed
+    assert second.get("b") == "Display"
+    second.close()
+
+
+def test_evict_forgets_memory_and_disk(cache):
+    cache.put("a", "model", "GOAL_COMPLETE")
+    cache.evict("a")
+    assert cache.get("a") is None
+    cache.evict("never stored")
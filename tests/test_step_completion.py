@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from circular_window import FollowAlongManager, Frame, WindowMasker
+
+MAIN_WINDOW = (0, 0, 160, 120)
+OVERLAY = (320, 192, 448, 256)  # Highlight around the step's target
+
+
+def screen(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+
+
+class Capture:
+    """Monitoring frames the way ScreenCaptureWorker produces them"""
+
+    def __init__(self):
+        self.masker = WindowMasker()
+        self.masker.set_rects([MAIN_WINDOW])
+        self.seq = 0
+
+    def grab(self, pixels):
+        self.seq += 1
+        image, rects, stable = self.masker.mask(Image.fromarray(pixels))
+        frame = Frame(image, seq=self.seq)
+        frame.masked_rects = rects
+        frame.mask_stable = stable
+        return frame
+
+
+@pytest.fixture
+def manager():
+    manager = FollowAlongManager(None)
+    manager.tts_engine = None
+    manager.guided_mode = True
+    manager.current_step = 1
+    return manager
+
+
+def show_step(capture, manager, pixels):
+    """Capture the screen, then show the overlay as the window does"""
+    before = capture.grab(pixels)
+    capture.masker.set_rects([MAIN_WINDOW, OVERLAY])
+    manager.setStepShown("Click the button", [OVERLAY], after_seq=before.seq)
+
+
+def test_first_frame_masked_from_previous_capture_is_unstable():
+    capture = Capture()
+    capture.grab(screen())
+    capture.masker.set_rects([MAIN_WINDOW, OVERLAY])
+    assert not capture.grab(screen()).mask_stable
+    assert capture.grab(screen()).mask_stable
+
+
+def test_unchanged_screen_with_overlay_shown_does_not_complete(manager):
+    capture = Capture()
+    pixels = screen()
+    show_step(capture, manager, pixels)
+    results = [manager.checkStepCompletion(capture.grab(pixels)) for _ in range(8)]
+    assert not any(results)
+    assert manager.step_start_frame.seq == 3  # The second frame after the overlay appeared
+
+
+def test_change_next_to_target_completes_once_settled(manager):
+    capture = Capture()
+    pixels = screen()
+    show_step(capture, manager, pixels)
+    for _ in range(3):
+        assert not manager.checkStepCompletion(capture.grab(pixels))
+    # A toggle redrawn just left of the highlight, outside the masked overlay
+    toggled = pixels.copy()
+    toggled[200:240, 264:312] = 0
+    # One changed tile is within settle_tiles, so the first changed frame already counts as settled
+    results = [manager.checkStepCompletion(capture.grab(toggled)) for _ in range(manager.settle_frames)]
+    assert results == [False] * (manager.settle_frames - 1) + [True]
+
+
+def test_frames_from_before_the_overlay_are_not_used_as_start(manager):
+    capture = Capture()
+    pixels = screen()
+    show_step(capture, manager, pixels)
+    manager.checkStepCompletion(Frame(Image.fromarray(pixels), seq=1))
+    assert manager.step_start_frame is None
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from circular_window import OcrEngine, OcrPreprocessor, StreamingLocator, TileOcrCache
+
+
+class BlobEngine(OcrEngine):
+    """Fake Tesseract: every non-white gray level is one word, named after its level"""
+    name = "blob"
+
+    def __init__(self, process_per_call=False):
+        self.process_per_call = process_per_call
+        self.calls = []
+
+    def image_to_data(self, image, profile=None):
+        self.calls.append(image.size)
+        pixels = np.asarray(image.convert("L"))
+        data = {key: [] for key in ("text", "conf", "left", "top", "width", "height",
+                                    "block_num", "par_num", "line_num")}
+        for level in np.unique(pixels):
+            if level == 255:
+                continue
+            ys, xs = np.nonzero(pixels == level)
+            for key, value in (("text", f"w{level}"), ("conf", 90), ("left", xs.min()), ("top", ys.min()),
+                               ("width", xs.max() - xs.min() + 1), ("height", ys.max() - ys.min() + 1),
+                               ("block_num", 1), ("par_num", 1), ("line_num", 1)):
+                data[key].append(value)
+        return data
+
+
+def make_cache(process_per_call=False, **kwargs):
+    engine = BlobEngine(process_per_call)
+    cache = TileOcrCache(engine=engine, preprocessor=OcrPreprocessor(grayscale=False, invert=False),
+                         text_scale=1.0, **kwargs)
+    return cache, engine
+
+
+def screen(words, size=(300, 200)):
+    """White image with one filled box per (level, left, top, right, bottom)"""
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for level, *box in words:
+        draw.rectangle(box, fill=(level, level, level))
+    return image
+
+
+WORDS = [(10, 20, 20, 60, 30), (20, 90, 40, 130, 50), (30, 150, 150, 190, 160), (40, 30, 120, 50, 130)]
+
+
+def boxes(candidates):
+    return sorted((c["text"], c["left"], c["top"], c["width"], c["height"]) for c in candidates)
+
+
+def test_word_across_a_tile_border_is_read_once_and_whole():
+    cache, _ = make_cache(tile_size=100, overlap=20)
+    found = cache.ocr(screen([(10, 80, 40, 115, 50)]))
+    assert boxes(found) == [("w10", 80, 40, 36, 11)]
+
+
+def test_renumber_sorts_top_to_bottom_then_left_to_right():
+    cache, _ = make_cache(tile_size=100, overlap=20)
+    found = cache.ocr(screen(WORDS))
+    assert [c["text"] for c in found] == ["w10", "w20", "w40", "w30"]
+    assert [c["ocr_id"] for c in found] == [1, 2, 3, 4]
+
+
+def test_line_keys_are_prefixed_with_the_tile():
+    cache, _ = make_cache(tile_size=100, overlap=20)
+    found = cache.ocr(screen(WORDS))
+    assert {c["line_key"][0] for c in found} == {0, 1, 3, 4}  # Tiles in row-major order, 3 per row
+
+
+def test_unchanged_tiles_come_from_the_cache():
+    cache, engine = make_cache(tile_size=100, overlap=20)
+    cache.ocr(screen(WORDS))
+    assert len(engine.calls) == 6
+    engine.calls.clear()
+    cache.ocr(screen(WORDS))
+    assert engine.calls == []
+    assert cache.hit_rate() == pytest.approx(0.5)
+    changed = cache.ocr(screen(WORDS[:-1] + [(50, 260, 180, 280, 190)]))
+    # Only the new word's tile is read: the tile it left is now blank, and an identical
+    # blank tile was cached already (keys are content hashes, not positions)
+    assert len(engine.calls) == 1
+    assert "w50" in {c["text"] for c in changed}
+
+
+def test_batched_read_gives_the_same_words_in_one_call():
+    per_tile, per_tile_engine = make_cache(tile_size=100, overlap=20)
+    batched, batched_engine = make_cache(process_per_call=True, tile_size=100, overlap=20)
+    image = screen(WORDS + [(60, 95, 95, 108, 104)])
+    assert boxes(batched.ocr(image)) == boxes(per_tile.ocr(image))
+    assert len(batched_engine.calls) == 1 and len(per_tile_engine.calls) == 6
+    # The split entries serve later per-tile lookups
+    batched_engine.calls.clear()
+    assert boxes(batched.ocr(image)) == boxes(per_tile.ocr(image))
+    assert batched_engine.calls == []
+
+
+def test_ocr_tiles_streams_the_same_words_as_ocr():
+    cache, _ = make_cache(tile_size=100, overlap=20)
+    image = screen(WORDS)
+    streamed = [(words, cached) for words, cached in cache.ocr_tiles(image, priority_rects=[(150, 100, 300, 200)])]
+    assert boxes(w for words, _ in streamed for w in words) == boxes(make_cache(tile_size=100, overlap=20)[0].ocr(image))
+    assert not any(cached for _, cached in streamed)
+    first_words = streamed[0][0]
+    assert [w["text"] for w in first_words] == ["w30"]  # The priority tile is read first
+    assert all(cached for _, cached in cache.ocr_tiles(image))
+
+
+def test_locate_that_stops_early_marks_its_set_partial():
+    cache, _ = make_cache(tile_size=100, overlap=20)
+    image = screen(WORDS)
+    found = StreamingLocator("w30", [(150, 100, 300, 200)], cache=cache).run(image)
+    assert [c["text"] for c in found] == ["w30"] and found.partial
+    missed = StreamingLocator("w99", cache=cache).run(image)
+    assert len(missed) == len(WORDS) and not missed.partial